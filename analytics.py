@@ -0,0 +1,162 @@
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EPOCH = datetime(1970, 1, 1)
+COLUMNS = ("nickname", "visits", "first_seen", "last_seen", "watch_time")
+
+
+def naive_epoch(value) -> int:
+    # Время в chatters.json локальное и без зоны: считаем секунды
+    # «как есть», одинаково для NumPy и для запасного пути.
+    if isinstance(value, datetime):
+        return int((value.replace(tzinfo=None) - EPOCH).total_seconds())
+    return int(value)
+
+
+def parse_times(values):
+    if np is not None:
+        try:
+            return np.array(values, dtype="datetime64[s]").astype("int64")
+        except ValueError:
+            pass
+    parsed = []
+    for value in values:
+        try:
+            parsed.append(naive_epoch(datetime.fromisoformat(value)))
+        except (TypeError, ValueError):
+            parsed.append(0)
+    return np.array(parsed, dtype="int64") if np is not None else parsed
+
+
+class ChatterTable:
+    # История чаттеров в виде колонок (ник, визиты, первый/последний раз
+    # в секундах, время просмотра). С NumPy сортировка, фильтры, суммы и
+    # перцентили векторные; без него — те же операции на списках.
+    def __init__(self, usernames, visits, first_seen, last_seen, watch_time):
+        self.size = len(usernames)
+        self.first_seen_text = first_seen
+        self.last_seen_text = last_seen
+        if np is not None:
+            self.usernames = np.array(usernames, dtype=object)
+            self.visits = np.array(visits, dtype="int64")
+            self.watch_time = np.array(watch_time, dtype="int64")
+        else:
+            self.usernames = list(usernames)
+            self.visits = [int(value) for value in visits]
+            self.watch_time = [int(value) for value in watch_time]
+        self.first_seen = parse_times(first_seen)
+        self.last_seen = parse_times(last_seen)
+        self.orders = {}
+        self.lower_names = None
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(*store.columns())
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name: str):
+        if name == "nickname":
+            if self.lower_names is None:
+                names = [username.lower() for username in self.usernames]
+                self.lower_names = np.array(names, dtype=str) if np is not None else names
+            return self.lower_names
+        return {
+            "visits": self.visits,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "watch_time": self.watch_time
+        }[name]
+
+    def order(self, column: str, descending: bool = False, rows=None):
+        # Порядок по возрастанию считается один раз на колонку и кэшируется,
+        # обратный — просто разворот.
+        ascending = self.orders.get(column)
+        if ascending is None:
+            values = self.column(column)
+            if np is not None:
+                ascending = np.argsort(values, kind="stable")
+            else:
+                ascending = sorted(range(self.size), key=values.__getitem__)
+            self.orders[column] = ascending
+        if rows is not None:
+            if np is not None:
+                keep = np.zeros(self.size, dtype=bool)
+                keep[rows] = True
+                ascending = ascending[keep[ascending]]
+            else:
+                keep = set(rows)
+                ascending = [index for index in ascending if index in keep]
+        return ascending[::-1] if descending else ascending
+
+    def select(self, min_watch_time: int = 0, prefix: str = None, since=None, until=None, search: str = None):
+        # Индексы строк под фильтр: минимальное время, префикс или подстрока
+        # ника (без учёта регистра), последний визит в [since, until).
+        since = naive_epoch(since) if since is not None else None
+        until = naive_epoch(until) if until is not None else None
+        prefix = prefix.lower() if prefix else None
+        search = search.lower() if search else None
+        if np is not None:
+            mask = np.ones(self.size, dtype=bool)
+            if min_watch_time:
+                mask &= self.watch_time >= min_watch_time
+            if since is not None:
+                mask &= self.last_seen >= since
+            if until is not None:
+                mask &= self.last_seen < until
+            if prefix:
+                mask &= np.char.startswith(self.column("nickname"), prefix)
+            if search:
+                mask &= np.char.find(self.column("nickname"), search) >= 0
+            return np.flatnonzero(mask)
+        return [
+            index for index in range(self.size)
+            if self.watch_time[index] >= min_watch_time
+            and (since is None or self.last_seen[index] >= since)
+            and (until is None or self.last_seen[index] < until)
+            and (not prefix or self.column("nickname")[index].startswith(prefix))
+            and (not search or search in self.column("nickname")[index])
+        ]
+
+    def totals(self, rows=None) -> dict:
+        if np is not None:
+            visits = self.visits if rows is None else self.visits[rows]
+            watch_time = self.watch_time if rows is None else self.watch_time[rows]
+            return {"users": int(len(visits)), "visits": int(visits.sum()), "watch_time": int(watch_time.sum())}
+        rows = range(self.size) if rows is None else rows
+        return {
+            "users": len(rows),
+            "visits": sum(self.visits[index] for index in rows),
+            "watch_time": sum(self.watch_time[index] for index in rows)
+        }
+
+    def percentiles(self, column: str = "watch_time", q=(50, 90, 99), rows=None) -> dict:
+        values = self.column(column)
+        if np is not None:
+            values = values if rows is None else values[rows]
+            if not len(values):
+                return {p: 0 for p in q}
+            return {p: int(value) for p, value in zip(q, np.percentile(values, q, method="nearest"))}
+        values = sorted(values if rows is None else [values[index] for index in rows])
+        if not values:
+            return {p: 0 for p in q}
+        return {p: values[min(len(values) - 1, round(p / 100 * (len(values) - 1)))] for p in q}
+
+    def record(self, index) -> tuple:
+        index = int(index)
+        return self.usernames[index], {
+            "username": self.usernames[index],
+            "visits": int(self.visits[index]),
+            "first_seen": self.first_seen_text[index],
+            "last_seen": self.last_seen_text[index],
+            "total_watch_time": int(self.watch_time[index])
+        }
+
+    def records(self, rows):
+        for index in rows:
+            yield self.record(index)
@@ -0,0 +1,48 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fake_helix import FakeHelix
+from helix import HelixClient
+
+
+class NoReuseSession:
+    # Старое поведение: каждый запрос — новый requests.get и новое соединение.
+    def get(self, url, **kwargs):
+        return requests.get(url, **kwargs)
+
+
+def run(label, session, helix, rounds):
+    client = HelixClient("bench", "token", base_url=helix.base_url, session=session)
+    timings = []
+    chatters, total = set(), 0
+    for _ in range(rounds):
+        connections = helix.connections
+        started = time.perf_counter()
+        chatters, total = client.get_chatters(helix.broadcaster_id)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"{label:<10} users={len(chatters)} total={total} "
+          f"connections/fetch={helix.connections - connections} "
+          f"best={timings[0] * 1000:.1f}ms median={timings[len(timings) // 2] * 1000:.1f}ms")
+    print(f"{'':<10} {client.latency_summary()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Полная выгрузка чаттеров с фейкового Helix")
+    parser.add_argument("--chatters", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with FakeHelix(f"user{i}" for i in range(args.chatters)) as helix:
+        run("session", requests.Session(), helix, args.rounds)
+        run("no-reuse", NoReuseSession(), helix, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config
+import metrics
+from benchmarks.fake_helix import FakeHelix
+from engine import create_channels
+from helix import HelixClient
+from history import SESSION_COLUMNS, append_columns
+from storage import TIME_FORMAT, STORES, SQLITE_SCHEMA, save_chatters_data
+
+try:
+    import resource
+except ImportError:
+    # Windows: модуля resource нет, пик RSS берём из psutil, если он есть.
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+SCENARIOS = ("steady", "churn", "raid")
+STAGES = ("fetch", "diff", "persist", "overlay", "log")
+STREAM = {"is_live": True, "viewer_count": 0, "game_name": "Just Chatting", "title": "bench",
+          "started_at": "2026-01-01T18:00:00Z", "user_login": "bench", "type": "live"}
+
+
+def audience(scenario: str, tick: int, ticks: int, raid_size: int) -> list:
+    # Детерминированные аудитории: ники user<N> совпадают с историей,
+    # так что часть входов попадает в существующие записи.
+    if scenario == "steady":
+        return [f"user{i}" for i in range(1000)]
+    if scenario == "churn":
+        # Окно в 50k сдвигается на 2 500 за тик: 5% выходят, 5% входят.
+        start = tick * 2500
+        return [f"user{i}" for i in range(start, start + 50_000)]
+    if scenario == "raid":
+        # Рейд в средней трети прогона: резкий вход и такой же резкий уход.
+        base = [f"user{i}" for i in range(1000)]
+        if ticks // 3 <= tick < 2 * ticks // 3:
+            return base + [f"raider{i}" for i in range(raid_size)]
+        return base
+    raise ValueError(scenario)
+
+
+def serve_helix(connection, scenario: str, ticks: int, raid_size: int):
+    # Фейковый Helix живёт в отдельном процессе, чтобы его сокеты
+    # и память не попадали в замеры процесса с конвейером.
+    with FakeHelix(stream=STREAM) as helix:
+        connection.send(helix.base_url)
+        while True:
+            tick = connection.recv()
+            if tick is None:
+                break
+            helix.set_chatters(audience(scenario, tick, ticks, raid_size))
+            connection.send(len(helix.chatters))
+
+
+HISTORY_START = datetime(2025, 1, 1)
+
+
+def history_record(i: int) -> tuple:
+    first = HISTORY_START + timedelta(minutes=i % 500_000)
+    last = first + timedelta(hours=i % 97)
+    return f"user{i}", 1 + i % 13, first.strftime(TIME_FORMAT), last.strftime(TIME_FORMAT), (i * 37) % 400_000
+
+
+def seed_history(channel_dir: Path, storage: str, size: int):
+    # История из size пользователей и size визитов, как после долгой работы.
+    channel_dir.mkdir(parents=True, exist_ok=True)
+    path = channel_dir / STORES[storage][1]
+    if storage == "sqlite":
+        db = sqlite3.connect(str(path))
+        db.executescript(SQLITE_SCHEMA)
+        db.executemany(
+            "INSERT INTO users (username, visits, first_seen, last_seen, total_watch_time) VALUES (?, ?, ?, ?, ?)",
+            map(history_record, range(size)))
+        db.commit()
+        db.close()
+    else:
+        save_chatters_data(path, {
+            username: {"username": username, "visits": visits, "first_seen": first_seen,
+                       "last_seen": last_seen, "total_watch_time": watch_time}
+            for username, visits, first_seen, last_seen, watch_time in map(history_record, range(size))
+        })
+    history_dir = channel_dir / "history"
+    history_dir.mkdir(exist_ok=True)
+    (history_dir / "users.txt").write_text("".join(f"user{i}\n" for i in range(size)), encoding="utf-8")
+    base = int(HISTORY_START.timestamp())
+    append_columns(history_dir, "sessions", SESSION_COLUMNS,
+                   [(i, base + i * 10, base + i * 10 + 600 + i % 3600, 0) for i in range(size)])
+
+
+def written_bytes() -> int:
+    # wchar из /proc/self/io: всё, что процесс передал в write(),
+    # включая файлы, которые ОС ещё не сбросила на диск. Вне Linux — None.
+    try:
+        with open("/proc/self/io", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def peak_rss_mb():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux отдаёт килобайты, macOS — байты.
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    if psutil is not None:
+        # На Windows peak_wset — пиковый рабочий набор процесса в байтах.
+        peak = getattr(psutil.Process().memory_info(), "peak_wset", None)
+        if peak is not None:
+            return round(peak / (1024 * 1024), 1)
+    return None
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))] if ordered else 0.0
+
+
+def stage_means(login: str) -> dict:
+    with metrics.tick_stage_seconds.lock:
+        values = dict(metrics.tick_stage_seconds.values)
+    means = {}
+    for stage in STAGES:
+        state = values.get((login, stage))
+        if state:
+            means[stage] = round(state[1] / state[2] * 1000, 3)
+    return means
+
+
+def run_case(scenario: str, history: int, storage: str, event_log: bool, ticks: int, raid_size: int,
+             checkpoint_every: int, keep: bool = False) -> dict:
+    directory = Path(tempfile.mkdtemp(prefix="tw_bench_"))
+    channel_dir = directory / "bench"
+    # История готовится в отдельном процессе: её генерация не должна
+    # попасть в пик RSS самого конвейера.
+    started = time.perf_counter()
+    seeder = multiprocessing.Process(target=seed_history, args=(channel_dir, storage, history))
+    seeder.start()
+    seeder.join()
+    if seeder.exitcode:
+        raise RuntimeError(f"Не удалось подготовить историю ({seeder.exitcode})")
+    seed_seconds = time.perf_counter() - started
+
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=serve_helix, args=(child, scenario, ticks, raid_size), daemon=True)
+    server.start()
+    try:
+        base_url = parent.recv()
+        client = HelixClient("bench", "token", base_url=base_url)
+        started = time.perf_counter()
+        channel = create_channels(client, ["bench"], directory, storage=storage, event_log=event_log,
+                                  log=lambda message: None)[0]
+        channel.start()
+        open_seconds = time.perf_counter() - started
+        pool = ThreadPoolExecutor(max_workers=2)
+        timings, audience_sizes = [], []
+        written_before = written_bytes()
+        for tick in range(ticks):
+            parent.send(tick)
+            audience_sizes.append(parent.recv())
+            started = time.perf_counter()
+            channel.tick(pool, 30)
+            if checkpoint_every and (tick + 1) % checkpoint_every == 0:
+                channel.checkpoint()
+            timings.append(time.perf_counter() - started)
+        written_after = written_bytes()
+        channel.stop()
+        pool.shutdown()
+        client.close()
+    finally:
+        parent.send(None)
+        server.join(5)
+        if not keep:
+            shutil.rmtree(directory, ignore_errors=True)
+    total = sum(timings)
+    return {
+        "scenario": scenario,
+        "history": history,
+        "storage": storage,
+        "event_log": event_log,
+        "ticks": ticks,
+        "audience_max": max(audience_sizes),
+        "seed_s": round(seed_seconds, 2),
+        "open_s": round(open_seconds, 3),
+        "ticks_per_sec": round(ticks / total, 2) if total else None,
+        "tick_p50_ms": round(percentile(timings, 50) * 1000, 2),
+        "tick_p99_ms": round(percentile(timings, 99) * 1000, 2),
+        "tick_max_ms": round(max(timings) * 1000, 2),
+        "bytes_written_per_tick": (written_after - written_before) // ticks if written_before is not None else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "stage_mean_ms": stage_means("bench")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Конвейер мониторинга на фейковом Helix и синтетических аудиториях")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="steady (1k), churn (50k, 5%% за тик), raid (1k + рейд)")
+    parser.add_argument("--history", default="10000,100000,1000000",
+                        help="размеры истории через запятую, например 10000,5000000")
+    parser.add_argument("--storage", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--no-event-log", action="store_true", help="сохранять хранилище каждый тик")
+    parser.add_argument("--ticks", type=int, default=30)
+    parser.add_argument("--raid-size", type=int, default=20_000)
+    parser.add_argument("--checkpoint-every", type=int, default=0, help="свёртка журнала каждые N тиков")
+    parser.add_argument("--output", help="записать результаты в JSON-файл")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        # Дочерний процесс: один сценарий, чтобы пик RSS был его собственным.
+        print(json.dumps(run_case(**json.loads(args.case))))
+        return
+
+    results = []
+    for history in [int(value) for value in args.history.split(",")]:
+        for scenario in args.scenarios.split(","):
+            case = {"scenario": scenario, "history": history, "storage": args.storage,
+                    "event_log": not args.no_event_log, "ticks": args.ticks, "raid_size": args.raid_size,
+                    "checkpoint_every": args.checkpoint_every}
+            completed = subprocess.run([sys.executable, __file__, "--case", json.dumps(case)],
+                                       capture_output=True, text=True)
+            if completed.returncode:
+                print(completed.stderr, file=sys.stderr)
+                raise SystemExit(f"Сценарий {scenario} / {history} завершился с ошибкой")
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print(f"{scenario:<7} history={history:<8} {result['ticks_per_sec']:>8} тик/с "
+                  f"p50={result['tick_p50_ms']:.1f}ms p99={result['tick_p99_ms']:.1f}ms "
+                  f"write/tick={result['bytes_written_per_tick']} rss={result['peak_rss_mb'] or '—'}MB",
+                  file=sys.stderr)
+
+    report = {
+        "version": config.version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": datetime.now().strftime(TIME_FORMAT),
+        "results": results
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import heapq
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from storage import format_seconds, parse_duration
+
+
+def measure(label, func, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    print(f"{label:<28} best={min(timings) * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Строки HH:MM:SS против целых секунд")
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    seconds = {f"user{i}": rng.randrange(0, 500 * 3600) for i in range(args.records)}
+    as_strings = {username: {"total_watch_time": format_seconds(value)} for username, value in seconds.items()}
+    as_ints = {username: {"total_watch_time": value} for username, value in seconds.items()}
+
+    string_key = lambda item: parse_duration(item[1]["total_watch_time"])
+    int_key = lambda item: item[1]["total_watch_time"]
+
+    print(f"records={args.records}")
+    measure("top10 sort, strings", lambda: sorted(as_strings.items(), key=string_key, reverse=True)[:10], args.rounds)
+    measure("top10 sort, ints", lambda: sorted(as_ints.items(), key=int_key, reverse=True)[:10], args.rounds)
+    measure("top10 nlargest, ints", lambda: heapq.nlargest(10, as_ints.items(), key=int_key), args.rounds)
+    measure("total, strings", lambda: sum((parse_duration(u["total_watch_time"]) for u in as_strings.values()),
+                                          start=parse_duration("0:00:00")), args.rounds)
+    measure("total, ints", lambda: sum(u["total_watch_time"] for u in as_ints.values()), args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"offset:{offset}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode().split(":", 1)[1])
+    except (ValueError, IndexError):
+        return 0
+
+
+class FakeHelixHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.helix.lock:
+            self.server.helix.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        helix = self.server.helix
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        query = {key: values[-1] for key, values in params.items()}
+        with helix.lock:
+            helix.requests += 1
+        if url.path == "/helix/chat/chatters":
+            self.send_json(helix.chatters_page(query))
+        elif url.path == "/helix/streams":
+            self.send_json({"data": [helix.stream] if helix.stream else []})
+        elif url.path == "/helix/users":
+            self.send_json({"data": [helix.user(login) for login in params.get("login", [])]})
+        else:
+            self.send_json({"error": "Not Found", "status": 404}, status=404)
+
+
+class FakeHelix:
+    def __init__(self, chatters=(), stream=None, broadcaster_id="1000", host="127.0.0.1", port=0):
+        self.lock = threading.Lock()
+        self.chatters = list(chatters)
+        self.stream = stream
+        self.broadcaster_id = broadcaster_id
+        self.user_ids = {}
+        self.requests = 0
+        self.connections = 0
+        self.server = ThreadingHTTPServer((host, port), FakeHelixHandler)
+        self.server.daemon_threads = True
+        self.server.helix = self
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/helix"
+
+    def set_chatters(self, chatters):
+        chatters = list(chatters)
+        with self.lock:
+            self.chatters = chatters
+
+    def user(self, login: str) -> dict:
+        with self.lock:
+            user_id = self.user_ids.setdefault(login.lower(), str(int(self.broadcaster_id) + len(self.user_ids)))
+        return {"id": user_id, "login": login.lower(), "display_name": login}
+
+    def chatters_page(self, query: dict) -> dict:
+        first = max(1, min(int(query.get("first", 100)), 1000))
+        offset = decode_cursor(query["after"]) if query.get("after") else 0
+        with self.lock:
+            chatters = self.chatters
+        page = chatters[offset:offset + first]
+        payload = {
+            "data": [{"user_id": str(offset + i), "user_login": login, "user_name": login}
+                     for i, login in enumerate(page)],
+            "pagination": {},
+            "total": len(chatters)
+        }
+        if offset + first < len(chatters):
+            payload["pagination"]["cursor"] = encode_cursor(offset + first)
+        return payload
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
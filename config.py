@@ -0,0 +1,83 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from ignore import IgnoreFilter
+from storage import atomic_write_json, save_chatters_data, snapshot_path
+
+APP_NAME = "Twitch Chatters Logger"
+chatters_file = None
+settings_file = None
+settings_dir = None
+storage_backend = "json"
+CLIENT_ID = None
+ACCESS_TOKEN = None
+REDIRECT_URI = "http://localhost:3000"
+SCOPE = "moderator:read:chatters"
+BOTS_TO_IGNORE = {'moobot', 'nightbot', 'streamelements', 'streamlabs', 'wizebot'}
+version = "0.5.5"
+
+
+ignore_filter = IgnoreFilter(BOTS_TO_IGNORE)
+
+
+def should_ignore_user(username: str) -> bool:
+    return ignore_filter(username)
+
+
+def load_settings() -> dict:
+    if settings_file and settings_file.exists():
+        try:
+            settings = json.loads(settings_file.read_text(encoding="utf-8"))
+            BOTS_TO_IGNORE.update(settings.get("ignored_bots", []))
+            ignore_filter.compile(BOTS_TO_IGNORE)
+            return settings
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+
+def save_settings(data: dict):
+    try:
+        atomic_write_json(settings_file, data, indent=4, ensure_ascii=False)
+    except OSError as e:
+        print("Не удалось сохранить настройки:", e)
+
+
+def resource_path(rel: str) -> Path:
+    base = Path(sys._MEIPASS) if hasattr(sys, '_MEIPASS') else Path(__file__).parent
+    return base / rel
+
+
+def load_twitch_credentials(key_id, key_access):
+    return os.getenv(key_id), os.getenv(key_access)
+
+
+def default_settings_dir() -> Path:
+    appdata = os.getenv('APPDATA')
+    if appdata:
+        return Path(appdata) / APP_NAME
+    return Path(os.getenv('XDG_DATA_HOME') or Path.home() / ".local" / "share") / APP_NAME
+
+
+def init(data_dir=None, storage=None):
+    global chatters_file, settings_file, settings_dir, storage_backend, CLIENT_ID, ACCESS_TOKEN
+    settings_dir = Path(data_dir) if data_dir else default_settings_dir()
+    settings_dir.mkdir(parents=True, exist_ok=True)
+    chatters_file = settings_dir / "chatters.json"
+    settings_file = settings_dir / "settings.json"
+    settings_file.touch(exist_ok=True)
+    # Если основного файла нет, но есть снимок, пустой файл не создаём:
+    # load_chatters_data(recover=True) поднимет историю из снимка.
+    if not chatters_file.exists() and not snapshot_path(chatters_file, 1).exists():
+        save_chatters_data(chatters_file, {})
+    storage_backend = storage or load_settings().get("storage", "json")
+    load_dotenv(resource_path('.env'))
+    CLIENT_ID, ACCESS_TOKEN = load_twitch_credentials('twitch_id', 'twitch_user_token')
+    if ACCESS_TOKEN is None:
+        ACCESS_TOKEN = ""
+    if CLIENT_ID is None:
+        CLIENT_ID = ""
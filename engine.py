@@ -0,0 +1,427 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+import metrics
+from eventlog import EventLog, event, recover
+from history import SessionHistory, stream_id
+from ignore import IgnoreFilter
+from overlay import build_obs_data, install_overlay_assets, write_obs_data
+from scheduler import TickScheduler
+from storage import ChatterStore, open_store
+
+logger = logging.getLogger(__name__)
+
+BURST_THRESHOLD = 20
+BURST_SAMPLE = 10
+
+
+def format_count(value: int) -> str:
+    return f"{value:,}".replace(",", " ")
+
+
+def churn_lines(users, icon: str, label: str, verb: str, verb_many: str, sign: str = "",
+                threshold: int = BURST_THRESHOLD, watch_totals=None) -> list:
+    # До threshold входов/выходов — строка на каждого, больше — одна
+    # сводная строка с несколькими никами, так что её размер не зависит
+    # от рейда. С watch_totals (одна пакетная выборка из хранилища) в
+    # сводку попадают ники с наибольшим временем просмотра.
+    if len(users) <= threshold:
+        return [f"{icon} [{label}] Пользователь '{user}' {verb}" for user in users]
+    if watch_totals is None:
+        sample = heapq.nsmallest(BURST_SAMPLE, users)
+        title = "например"
+    else:
+        totals = watch_totals(users)
+        sample = heapq.nsmallest(BURST_SAMPLE, users, key=lambda user: (-totals.get(user, 0), user))
+        title = "дольше всех смотрели"
+    rest = len(users) - len(sample)
+    return [f"{icon} [{label}] {sign}{format_count(len(users))} {verb_many}, {title}: {', '.join(sample)}"
+            + (f" и ещё {format_count(rest)}" if rest else "")]
+
+
+class ChannelMonitor:
+    # Состояние и конвейер одного канала: запрос Helix, дифф входов/выходов,
+    # запись в хранилище и обновление obs_data.json.
+    def __init__(self, helix, login: str, broadcaster_id: str, store: ChatterStore, obs_dir=None,
+                 interval: float = 10, ignore=None, log=None, on_http_error=None, event_log: EventLog = None,
+                 history: SessionHistory = None, burst_threshold: int = BURST_THRESHOLD):
+        self.helix = helix
+        self.login = login
+        self.broadcaster_id = broadcaster_id
+        self.store = store
+        self.obs_dir = Path(obs_dir) if obs_dir else None
+        self.obs_data_file = self.obs_dir / "obs_data.json" if self.obs_dir else None
+        self.scheduler = TickScheduler(interval)
+        self.ignore = ignore or IgnoreFilter()
+        self.log = log or logger.info
+        self.on_http_error = on_http_error
+        self.event_log = event_log
+        self.history = history
+        self.burst_threshold = burst_threshold
+        self.lock = threading.Lock()
+        self.busy = False
+        self.stopped = False
+        self.previous_chatters = set()
+        self.user_entry_times = {}
+        self.user_entry_streams = {}
+        self.chatters_total = 0
+        self.roster_short = False
+        self.chatters_future = None
+        self.stream_future = None
+        self.last_stream_info = None
+
+    def start(self):
+        if self.event_log:
+            recover(self.store, self.event_log, self.history)
+        self.store.enable_leaderboard(10, self.ignore)
+        if self.obs_dir:
+            install_overlay_assets(self.obs_dir)
+        self.update_obs_files(set(), None)
+
+    def stop(self):
+        with self.lock:
+            if self.stopped:
+                return
+            self.stopped = True
+            now = datetime.now()
+            stream = self.current_stream(self.last_stream_info)
+            self.close_sessions(list(self.user_entry_times), now, stream)
+            if self.history is not None:
+                self.history.flush()
+            self.previous_chatters.clear()
+            if self.event_log:
+                self.event_log.checkpoint(self.store.checkpoint)
+                self.event_log.close()
+            else:
+                self.store.flush(force=True)
+            self.chatters_future = None
+            self.stream_future = None
+            self.last_stream_info = None
+        self.update_obs_files(set(), None)
+
+    def check_roster(self, fetched: int, total: int):
+        # total — сколько чаттеров Helix насчитал сам; если страницы дали
+        # меньше, список неполный (курсор сбился или истёк). Предупреждаем
+        # один раз, пока расхождение не пропадёт.
+        metrics.chatters_total.set(total, channel=self.login)
+        short = fetched < total
+        if short and not self.roster_short:
+            self.log(f"⚠️ Получено {fetched} из {total} чаттеров: список неполный")
+        self.roster_short = short
+
+    def get_chatters(self):
+        try:
+            chatters, self.chatters_total = self.helix.get_chatters(self.broadcaster_id)
+            self.check_roster(len(chatters), self.chatters_total)
+            if chatters:
+                return self.ignore.filter(chatters)
+            else:
+                self.log("⚠️ API вернул пустой список чаттеров")
+                return set()
+
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code
+            if status == 401:
+                self.log("❌ Токен истек или неверный. Требуется повторная авторизация.")
+            elif status == 403:
+                self.log("❌ Нет прав для чтения чаттеров. Нужен модератор или стример.")
+                self.log(f"   Требуется scope: moderator:read:chatters")
+            else:
+                self.log(f"❌ HTTP ошибка {status}: {e}")
+            if self.on_http_error:
+                self.on_http_error(status)
+            return None
+        except Exception as e:
+            self.log(f"❌ Ошибка сети: {e}")
+            return None
+
+    def get_stream_info(self):
+        try:
+            stream = self.helix.get_stream(self.broadcaster_id)
+            if stream:
+                return {
+                    "viewer_count": stream.get("viewer_count", 0),
+                    "title": stream.get("title", ""),
+                    "game_name": stream.get("game_name", ""),
+                    "is_live": True,
+                    "started_at": stream.get("started_at", "")
+                }
+            else:
+                return {
+                    "viewer_count": 0,
+                    "title": "",
+                    "game_name": "",
+                    "is_live": False,
+                    "started_at": ""
+                }
+        except Exception as e:
+            self.log(f"⚠️ Ошибка получения инфо стрима: {e}")
+            return None
+
+    def fetch(self, pool: ThreadPoolExecutor, deadline: float):
+        # Чаттеры и инфо о стриме запрашиваются параллельно с общим дедлайном.
+        # Не успевший запрос не блокирует тик: его результат заберёт следующий,
+        # а пока используются последние известные данные.
+        if self.chatters_future is None:
+            self.chatters_future = pool.submit(self.get_chatters)
+        if self.stream_future is None:
+            self.stream_future = pool.submit(self.get_stream_info)
+        chatters_future, stream_future = self.chatters_future, self.stream_future
+        done, _ = wait([chatters_future, stream_future], timeout=deadline)
+        chatters = None
+        if chatters_future in done:
+            chatters = chatters_future.result()
+            self.chatters_future = None
+        else:
+            self.log(f"⚠️ Список чаттеров не получен за {deadline:.1f} с")
+        if stream_future in done:
+            self.last_stream_info = stream_future.result()
+            self.stream_future = None
+        return chatters, self.last_stream_info
+
+    def stage(self, name: str):
+        return metrics.tick_stage_seconds.time(channel=self.login, stage=name)
+
+    def tick(self, pool: ThreadPoolExecutor, deadline: float):
+        with metrics.tick_seconds.time(channel=self.login):
+            with self.stage("fetch"):
+                current_chatters, stream_info = self.fetch(pool, deadline)
+            with self.lock:
+                if self.stopped:
+                    return
+                if current_chatters is None:
+                    with self.stage("overlay"):
+                        self.update_obs_files(self.previous_chatters, stream_info)
+                    return
+                with self.stage("overlay"):
+                    self.update_obs_files(current_chatters, stream_info)
+                with self.stage("diff"):
+                    newcomers = current_chatters - self.previous_chatters
+                    leavers = [user for user in self.previous_chatters - current_chatters
+                               if user in self.user_entry_times]
+                with self.stage("persist"):
+                    self.persist(current_chatters, newcomers, leavers, stream_info)
+                with self.stage("log"):
+                    self.log_churn(newcomers, leavers)
+                metrics.chatters_online.set(len(current_chatters), channel=self.login)
+                metrics.chatters_joins.inc(len(newcomers), channel=self.login)
+                metrics.chatters_leaves.inc(len(leavers), channel=self.login)
+
+    def persist(self, current_chatters, newcomers, leavers, stream_info):
+        now = datetime.now()
+        stream = self.current_stream(stream_info)
+        if self.event_log:
+            # Сначала журнал, потом хранилище: запись за тик пропорциональна
+            # числу входов/выходов, а не размеру истории.
+            self.event_log.append([event("join", now, user, stream=stream) for user in newcomers])
+        for user in newcomers:
+            self.user_entry_times[user] = now
+            if stream:
+                self.user_entry_streams[user] = stream
+            self.store.update_chatter(user, 'entry', now=now)
+        self.close_sessions(leavers, now, stream)
+        if self.event_log:
+            self.event_log.append([event("beat", now, stream=stream)])
+        if self.history is not None:
+            self.history.sample(now, len(current_chatters))
+        self.store.update_all_online_users(current_chatters, now=now)
+        if not self.event_log:
+            self.store.flush()
+        self.previous_chatters = set(current_chatters)
+
+    def log_churn(self, newcomers, leavers):
+        # Поимённо каждый вход/выход остаётся в журнале событий и истории
+        # визитов, а в лог при рейде или конце стрима идёт сводка.
+        # Рейдеры — новые зрители без истории, поэтому ранжируются только выходы.
+        lines = churn_lines(newcomers, "🟢", "ВХОД", "зашёл в чат", "зашли в чат", "+",
+                            self.burst_threshold)
+        lines += churn_lines(leavers, "🔴", "ВЫХОД", "вышел из чата", "вышли из чата", "−",
+                             self.burst_threshold, self.store.watch_totals)
+        for line in lines:
+            self.log(line)
+
+    @staticmethod
+    def current_stream(stream_info) -> int:
+        if not stream_info or not stream_info.get("is_live"):
+            return 0
+        return stream_id(stream_info.get("started_at", ""))
+
+    def close_sessions(self, users, now: datetime, stream: int = 0):
+        # Визит относится к стриму, который шёл при входе, а если зритель
+        # зашёл до начала эфира — к текущему.
+        sessions = []
+        for user in users:
+            entry_time = self.user_entry_times.pop(user)
+            sessions.append((user, entry_time, now, self.user_entry_streams.pop(user, 0) or stream))
+        if self.event_log:
+            self.event_log.append([event("leave", exited, user, entry_time, session_stream)
+                                   for user, entry_time, exited, session_stream in sessions])
+        for user, entry_time, _, _ in sessions:
+            self.store.update_chatter(user, 'exit', entry_time, now=now)
+        if self.history is not None and sessions:
+            self.history.add_sessions(sessions)
+
+    def checkpoint(self):
+        # Свёртка журнала: хранилище сбрасывается на диск, и сегменты,
+        # которые в него уже вошли, удаляются.
+        with self.lock:
+            if self.stopped or not self.event_log:
+                return False
+            if not self.store.dirty and self.event_log.empty:
+                return False
+            self.event_log.checkpoint(self.store.checkpoint)
+            return True
+
+    def update_obs_files(self, chatters, stream_info):
+        if not self.obs_data_file:
+            return
+        try:
+            top = self.store.top_watchers(10, self.ignore)
+            write_obs_data(self.obs_data_file, build_obs_data(top, chatters, stream_info, self.ignore,
+                                                               self.chatters_total))
+        except Exception as e:
+            self.log(f"⚠️ Ошибка обновления OBS данных: {e}")
+            logger.exception("Ошибка update_obs_files")
+
+
+class MonitorEngine:
+    # Опрашивает любое число каналов из одного процесса: один диспетчер
+    # с кучей сроков вместо потока на канал, общий пул Helix-соединений
+    # и общий бюджет rate limit. Каналы стартуют со сдвигом по интервалу,
+    # а тик канала, который ещё не закончил предыдущий, схлопывается.
+    def __init__(self, helix, interval: float = 10, workers: int = 8, log=None, compact_interval: float = 300):
+        self.helix = helix
+        self.interval = interval
+        self.deadline = interval * 0.8
+        self.log = log or logger.info
+        self.channels = {}
+        self.heap = []
+        self.seq = itertools.count()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = False
+        self.thread = None
+        self.compact_interval = compact_interval
+        self.compact_event = threading.Event()
+        self.compactor = None
+        self.clock = time.monotonic
+        self.tick_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tick")
+        self.fetch_pool = ThreadPoolExecutor(max_workers=workers * 2, thread_name_prefix="helix")
+
+    def add_channel(self, channel: ChannelMonitor, at: float = None):
+        with self.lock:
+            self.channels[channel.login] = channel
+            channel.scheduler.start(at)
+            heapq.heappush(self.heap, (channel.scheduler.next_tick, next(self.seq), channel))
+        self.wakeup.set()
+
+    def start(self):
+        with self.lock:
+            channels = list(self.channels.values())
+            self.heap = []
+            base = self.clock()
+            for index, channel in enumerate(channels):
+                channel.scheduler.start(base + self.interval * index / len(channels))
+                heapq.heappush(self.heap, (channel.scheduler.next_tick, next(self.seq), channel))
+        for channel in channels:
+            channel.start()
+        self.running = True
+        self.thread = threading.Thread(target=self.dispatch, name="dispatcher", daemon=True)
+        self.thread.start()
+        if any(channel.event_log for channel in channels):
+            self.compact_event.clear()
+            self.compactor = threading.Thread(target=self.compact, name="compactor", daemon=True)
+            self.compactor.start()
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        self.compact_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+        self.tick_pool.shutdown(wait=False, cancel_futures=True)
+        self.fetch_pool.shutdown(wait=False, cancel_futures=True)
+        with self.lock:
+            channels = list(self.channels.values())
+        for channel in channels:
+            channel.stop()
+
+    def dispatch(self):
+        while self.running:
+            with self.lock:
+                due = self.heap[0][0] if self.heap else None
+            delay = None if due is None else due - self.clock()
+            if delay is None or delay > 0:
+                self.wakeup.wait(delay)
+                self.wakeup.clear()
+                continue
+            with self.lock:
+                _, _, channel = heapq.heappop(self.heap)
+                if self.channels.get(channel.login) is not channel:
+                    continue
+                channel.scheduler.fire()
+                if channel.busy:
+                    channel.scheduler.skipped += 1
+                    metrics.ticks_skipped.inc(channel=channel.login)
+                else:
+                    channel.busy = True
+                    self.tick_pool.submit(self.run_tick, channel)
+                heapq.heappush(self.heap, (channel.scheduler.next_tick, next(self.seq), channel))
+
+    def compact(self):
+        while not self.compact_event.wait(self.compact_interval):
+            with self.lock:
+                channels = list(self.channels.values())
+            for channel in channels:
+                try:
+                    channel.checkpoint()
+                except Exception as e:
+                    channel.log(f"⚠️ Ошибка свёртки журнала событий: {e}")
+                    logger.exception("Ошибка свёртки журнала событий")
+
+    def run_tick(self, channel: ChannelMonitor):
+        scheduler = channel.scheduler
+        try:
+            if scheduler.last_lag >= scheduler.interval / 2:
+                channel.log(f"⚠️ Тик опоздал на {scheduler.last_lag:.1f} с (пропущено тиков: {scheduler.skipped})")
+            channel.tick(self.fetch_pool, self.deadline)
+        except Exception as e:
+            channel.log(f"⚠️ Ошибка мониторинга: {e}")
+            logger.exception("Ошибка в цикле мониторинга")
+        finally:
+            channel.busy = False
+
+
+def create_channels(helix, logins, data_dir, interval: float = 10, ignore=None, log=None,
+                    storage: str = "json", event_log: bool = True):
+    # Helix /users принимает до 100 логинов за запрос, так что
+    # сотни каналов резолвятся в несколько вызовов.
+    data_dir = Path(data_dir)
+    log = log or logger.info
+    channels = []
+    users = helix.get_users(logins)
+    for login in logins:
+        user = users.get(login.lower())
+        if not user:
+            log(f"❌ Канал не найден: {login}")
+            continue
+        channel_dir = data_dir / login.lower()
+        channel_dir.mkdir(parents=True, exist_ok=True)
+        channels.append(ChannelMonitor(
+            helix, login.lower(), user["id"], open_store(channel_dir, storage),
+            obs_dir=channel_dir / "obs_stats",
+            interval=interval,
+            ignore=ignore,
+            log=lambda message, prefix=f"[{login.lower()}] ": log(prefix + message),
+            event_log=EventLog(channel_dir / "events") if event_log else None,
+            history=SessionHistory(channel_dir / "history")
+        ))
+    return channels
@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+from storage import TIME_FORMAT, atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "events-"
+SEGMENT_SUFFIX = ".jsonl"
+CHECKPOINT_FILE = "checkpoint"
+
+
+def event(kind: str, ts: datetime, username: str = None, entered: datetime = None, stream: int = 0) -> dict:
+    record = {"ev": kind, "ts": int(ts.timestamp())}
+    if username is not None:
+        record["user"] = username
+    if entered is not None:
+        record["entered"] = int(entered.timestamp())
+    if stream:
+        record["stream"] = stream
+    return record
+
+
+class EventLog:
+    # Журнал входов/выходов в сегментах JSON Lines: за тик дописываются
+    # только события изменений и один heartbeat, а агрегированное хранилище
+    # сбрасывается на диск редко, на контрольных точках (checkpoint).
+    def __init__(self, directory, segment_size: int = 8 * 1024 * 1024, fsync: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.fsync = fsync
+        segments = self.segments()
+        self.segment = max(segments[-1][0] if segments else 1, self.read_checkpoint())
+        self.file = None
+        self.open_segment()
+
+    def segment_path(self, number: int) -> Path:
+        return self.directory / f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+    def segments(self):
+        segments = []
+        for path in self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"):
+            number = path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+            if number.isdigit():
+                segments.append((int(number), path))
+        return sorted(segments)
+
+    def read_checkpoint(self) -> int:
+        try:
+            return int((self.directory / CHECKPOINT_FILE).read_text(encoding="utf-8").strip())
+        except (FileNotFoundError, ValueError):
+            return 1
+
+    def open_segment(self):
+        self.file = open(self.segment_path(self.segment), "a", encoding="utf-8")
+
+    @property
+    def empty(self) -> bool:
+        return self.file.tell() == 0
+
+    def append(self, events):
+        if not events:
+            return
+        self.file.write("".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+                                for record in events))
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+        if self.file.tell() >= self.segment_size:
+            self.rotate()
+
+    def rotate(self):
+        self.file.close()
+        self.segment += 1
+        self.open_segment()
+
+    def checkpoint(self, flush):
+        # Порядок важен: новый сегмент -> сброс хранилища -> отметка -> удаление.
+        # flush(segment) сохраняет номер нового сегмента вместе с данными,
+        # поэтому сбой до записи файла checkpoint не приводит к повторному
+        # применению событий: replay пропустит всё, что уже в хранилище.
+        self.rotate()
+        flush(self.segment)
+        atomic_write_text(self.directory / CHECKPOINT_FILE, str(self.segment))
+        for number, path in self.segments():
+            if number < self.segment:
+                path.unlink(missing_ok=True)
+
+    def replay(self, start: int = 0):
+        # start — отметка из хранилища; файл checkpoint остаётся
+        # для хранилищ, сохранённых до появления отметки.
+        start = max(start, self.read_checkpoint())
+        for number, path in self.segments():
+            if number < start:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # Хвост сегмента мог оборваться при сбое.
+                        break
+
+    def close(self):
+        if self.file and not self.file.closed:
+            self.file.close()
+
+
+def recover(store, log: EventLog, history=None) -> int:
+    # Незакрытые визиты берутся из entry_time в хранилище и из событий
+    # журнала после последней контрольной точки; визиты, оборванные сбоем,
+    # закрываются временем последнего heartbeat. Стрим визита — из его
+    # события join, а для входов до контрольной точки — из последнего heartbeat.
+    open_sessions = store.open_sessions()
+    open_streams = {}
+    last_beat = None
+    last_stream = 0
+    applied = 0
+    for record in log.replay(store.log_segment):
+        kind = record.get("ev")
+        ts = datetime.fromtimestamp(record.get("ts", 0))
+        if kind == "join":
+            store.update_chatter(record["user"], 'entry', now=ts)
+            open_sessions[record["user"]] = ts
+            open_streams[record["user"]] = record.get("stream", 0)
+        elif kind == "leave":
+            entered = record.get("entered")
+            entry_time = datetime.fromtimestamp(entered) if entered else open_sessions.get(record["user"])
+            open_sessions.pop(record["user"], None)
+            open_streams.pop(record["user"], None)
+            store.update_chatter(record["user"], 'exit', entry_time, now=ts)
+        elif kind == "beat":
+            last_beat = ts
+            last_stream = record.get("stream", 0)
+        applied += 1
+    closed = []
+    for username, entry_time in open_sessions.items():
+        end = last_beat
+        if end is None:
+            user_data = store.get(username) or {}
+            end = datetime.strptime(user_data.get("last_seen") or entry_time.strftime(TIME_FORMAT), TIME_FORMAT)
+        end = max(end, entry_time)
+        store.update_chatter(username, 'exit', entry_time, now=end)
+        closed.append((username, entry_time, end, open_streams.get(username) or last_stream))
+    if history is not None and closed:
+        # Завершённые визиты история получила ещё во время работы,
+        # а оборванные сбоем — только здесь.
+        history.add_sessions(closed)
+    if applied or open_sessions:
+        logger.info("Журнал событий: применено %s событий, закрыто визитов: %s", applied, len(open_sessions))
+        log.checkpoint(store.checkpoint)
+    return applied
@@ -0,0 +1,187 @@
+import csv
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from storage import TIME_FORMAT, format_seconds, replace_file
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+CSV_HEADER = ("Ник", "Визиты", "Первый раз", "Последний раз", "Время пребывания", "Секунды")
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def export_format(path, fmt: str = None) -> str:
+    fmt = fmt or EXTENSIONS.get(Path(path).suffix.lower(), "csv")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат экспорта: {fmt}")
+    return fmt
+
+
+def parse_date(value: str) -> datetime:
+    # Для --since/--until: «2026-10-01» или «2026-10-01 18:00:00».
+    value = value.strip()
+    return datetime.strptime(value, TIME_FORMAT if " " in value else "%Y-%m-%d")
+
+
+def record_filter(since: datetime = None, until: datetime = None, min_watch_time: int = 0):
+    # Строки TIME_FORMAT сравниваются лексикографически так же, как даты.
+    since = since.strftime(TIME_FORMAT) if since else None
+    until = until.strftime(TIME_FORMAT) if until else None
+
+    def accept(user_data: dict) -> bool:
+        last_seen = user_data.get("last_seen", "")
+        return (user_data.get("total_watch_time", 0) >= min_watch_time
+                and (since is None or last_seen >= since)
+                and (until is None or last_seen < until))
+    return accept
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8-sig", newline="")
+        self.writer = csv.writer(self.file, delimiter=";")
+        self.writer.writerow(CSV_HEADER)
+
+    def write(self, records):
+        self.writer.writerows(
+            (username, user_data.get("visits", 0), user_data.get("first_seen", ""),
+             user_data.get("last_seen", ""), format_seconds(user_data.get("total_watch_time", 0)),
+             user_data.get("total_watch_time", 0))
+            for username, user_data in records
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, records):
+        self.file.write("".join(json.dumps(user_data, ensure_ascii=False) + "\n" for _, user_data in records))
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    # pyarrow — необязательная зависимость, нужна только для Parquet.
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Для экспорта в Parquet установите pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.schema = pa.schema([
+            ("username", pa.string()),
+            ("visits", pa.int64()),
+            ("first_seen", pa.timestamp("s")),
+            ("last_seen", pa.timestamp("s")),
+            ("total_watch_time", pa.int64())
+        ])
+        self.writer = pq.ParquetWriter(str(path), self.schema)
+
+    @staticmethod
+    def timestamp(value: str):
+        try:
+            return datetime.strptime(value, TIME_FORMAT)
+        except (TypeError, ValueError):
+            return None
+
+    def write(self, records):
+        if not records:
+            return
+        self.writer.write_table(self.pa.table({
+            "username": [username for username, _ in records],
+            "visits": [user_data.get("visits", 0) for _, user_data in records],
+            "first_seen": [self.timestamp(user_data.get("first_seen")) for _, user_data in records],
+            "last_seen": [self.timestamp(user_data.get("last_seen")) for _, user_data in records],
+            "total_watch_time": [user_data.get("total_watch_time", 0) for _, user_data in records]
+        }, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonLinesWriter, "parquet": ParquetWriter}
+
+
+def export_records(store, path, fmt: str = None, since: datetime = None, until: datetime = None,
+                   min_watch_time: int = 0, chunk_size: int = 10000, progress=None, cancel=None) -> int:
+    # Потоковый экспорт: порции из store.iter_records() сразу уходят
+    # в файл. Пишется во временный файл, который подменяет цель только
+    # после успешного завершения.
+    path = Path(path)
+    fmt = export_format(path, fmt)
+    accept = record_filter(since, until, min_watch_time)
+    total = len(store)
+    processed = exported = 0
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    try:
+        writer = WRITERS[fmt](tmp_path)
+        try:
+            for chunk in store.iter_records(chunk_size):
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled()
+                records = [(username, user_data) for username, user_data in chunk if accept(user_data)]
+                writer.write(records)
+                processed += len(chunk)
+                exported += len(records)
+                if progress:
+                    progress(processed, total)
+        finally:
+            writer.close()
+        replace_file(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    logger.info("Экспорт %s: %s записей -> %s", fmt, exported, path)
+    return exported
+
+
+class ExportJob:
+    # Экспорт в фоновом потоке: on_progress(processed, total) и
+    # on_done(count, error) вызываются из рабочего потока.
+    def __init__(self, store, path, on_progress=None, on_done=None, **options):
+        self.store = store
+        self.path = path
+        self.options = options
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="export", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        count, error = 0, None
+        try:
+            count = export_records(self.store, self.path, progress=self.on_progress,
+                                   cancel=self.cancel_event, **self.options)
+        except Exception as e:
+            error = e
+            if not isinstance(e, ExportCancelled):
+                logger.exception("Ошибка экспорта")
+        if self.on_done:
+            self.on_done(count, error)
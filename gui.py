@@ -0,0 +1,541 @@
+import atexit
+import requests
+import tkinter as tk
+import threading
+import webbrowser
+import logging
+import os
+import sys
+import tkinter.ttk as tk_ttk
+from datetime import datetime
+from tkinter import filedialog, messagebox, scrolledtext, simpledialog
+import config
+from config import BOTS_TO_IGNORE, REDIRECT_URI, SCOPE, load_settings, save_settings, version
+from engine import BURST_THRESHOLD, ChannelMonitor, MonitorEngine
+from export import ExportJob
+from eventlog import EventLog
+from history import SessionHistory
+from logpipe import LogPump
+from helix import HelixClient
+from overlay import overlay_assets, web_server
+from statsview import StatisticsView
+from storage import format_seconds, open_store
+
+
+class TwitchChatLogger:
+    def __init__(self, root):
+        self.root = root
+        self.root.title(f"Twitch Chat Logger (Helix API) v{version}")
+        self.root.geometry("900x750")
+        self.root.resizable(True, True)
+        self.root.configure(bg="#f0f0f0")
+        self.broadcaster_id = None
+        self.is_monitoring = False
+        self.poll_interval = 10
+        self.event_log = True
+        self.compact_interval = 300
+        self.burst_threshold = BURST_THRESHOLD
+        self.engine = None
+        self.channel = None
+        self.web_server_started = False
+        self.access_token = config.ACCESS_TOKEN
+        self.helix = HelixClient(config.CLIENT_ID, config.ACCESS_TOKEN)
+        self.log_file = config.settings_dir / "chat.log"
+        self.logger = self.setup_logger()
+        self.obs_dir = config.settings_dir / "obs_stats"
+        self.obs_dir.mkdir(exist_ok=True)
+        self.store = open_store(config.settings_dir, config.storage_backend)
+        atexit.register(self.store.flush, True)
+        self.history = SessionHistory(config.settings_dir / "history")
+        self.create_widgets()
+        self.log_pump = LogPump(self.log_text, self.log_file)
+        self.log_pump.start()
+        self.restore_fields()
+        self.clear_server_logs()
+
+    def clear_server_logs(self):
+        try:
+            obs_dir = self.obs_dir
+            log_filename = "web_server.log"
+            log_file = obs_dir / log_filename
+            os.remove(log_file)
+        except Exception as e:
+            pass
+
+    def setup_logger(self):
+        logger = logging.getLogger(__name__)
+        logging.basicConfig(
+            level=logging.INFO,
+            filename=config.settings_dir / "errors.log",
+            filemode="a",
+            format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+        )
+        return logger
+
+    def create_widgets(self):
+        title = tk.Label(
+            self.root,
+            text=f"📺 Twitch Chatters Logger v{version}",
+            font=("Arial", 16, "bold"),
+            bg="#f0f0f0",
+            fg="#333"
+        )
+        title.pack(pady=10)
+
+        self.auth_btn = tk.Button(
+            self.root,
+            text="🔑 Авторизоваться в Twitch",
+            command=self.auth_via_browser,
+            bg="#4a90e2",
+            fg="white",
+            font=("Arial", 12),
+            padx=10,
+            pady=5
+        )
+        self.auth_btn.pack(pady=5)
+        #
+        tk.Label(
+            self.root,
+            text="🔹 Имя канала:",
+            bg="#f0f0f0",
+            font=("Arial", 10)
+        ).pack(pady=(10, 0))
+
+        self.channel_entry = tk.Entry(self.root, font=("Arial", 12), width=30)
+        self.channel_entry.pack(pady=5)
+
+        self.check_btn = tk.Button(
+            self.root,
+            text="🔍 Проверить канал",
+            command=self.check_channel,
+            bg="#50e3c2",
+            fg="white",
+            font=("Arial", 10),
+            padx=8,
+            pady=3
+        )
+        self.check_btn.pack(pady=5)
+
+        self.status_label = tk.Label(
+            self.root,
+            text="⏳ Статус: Не авторизован",
+            bg="#f0f0f0",
+            fg="orange",
+            font=("Arial", 10)
+        )
+        self.status_label.pack(pady=5)
+
+        btn_frame = tk.Frame(self.root, bg="#f0f0f0")
+        btn_frame.pack(pady=10)
+
+        self.start_btn = tk.Button(
+            btn_frame,
+            text="▶️ Запустить мониторинг",
+            command=self.start_monitoring,
+            bg="#2ecc71",
+            fg="white",
+            font=("Arial", 10),
+            padx=10,
+            pady=5,
+            state="disabled"
+        )
+        self.start_btn.grid(row=0, column=0, padx=5)
+
+        self.stop_btn = tk.Button(
+            btn_frame,
+            text="⏹️ Остановить",
+            command=self.stop_monitoring,
+            bg="#e74c3c",
+            fg="white",
+            font=("Arial", 10),
+            padx=10,
+            pady=5,
+            state="disabled"
+        )
+        self.stop_btn.grid(row=0, column=1, padx=5)
+
+        self.open_browser_btn = tk.Button(
+            self.root,
+            text="🌐 Открыть в браузере",
+            command=self.web_server_files,
+            bg="#204760",
+            fg="white",
+            font=("Arial", 10, "bold"),
+            padx=15,
+            pady=8,
+            state="disabled"
+        )
+        self.open_browser_btn.pack(pady=(10, 5))
+
+
+        self.stats_btn = tk.Button(
+            self.root,
+            text="📊 Показать статистику",
+            command=self.show_statistics,
+            bg="#9b59b6",
+            fg="white",
+            font=("Arial", 11),
+            padx=15,
+            pady=5
+        )
+        self.stats_btn.pack(pady=8)
+
+        obs_info_frame = tk.Frame(self.root, bg="#f0f0f0", relief="ridge", bd=2)
+        obs_info_frame.pack(pady=5, padx=10, fill=tk.X)
+        tk.Label(
+            obs_info_frame,
+            text="📺 Настройка в OBS (Browser Source):",
+            bg="#f0f0f0",
+            font=("Arial", 10, "bold"),
+            fg="#e74c3c"
+        ).pack(pady=(5, 2))
+
+        tk.Label(
+            obs_info_frame,
+            text="1. Источники → + → Браузер",
+            bg="#f0f0f0",
+            font=("Arial", 9),
+            fg="#555"
+        ).pack(anchor="w", padx=10)
+
+        tk.Label(
+            obs_info_frame,
+            text="2. URL: выберите файл .html из папки",
+            bg="#f0f0f0",
+            font=("Arial", 9),
+            fg="#555"
+        ).pack(anchor="w", padx=10)
+
+        tk.Label(
+            obs_info_frame,
+            text="3. Ширина: 400, Высота: 600",
+            bg="#f0f0f0",
+            font=("Arial", 9),
+            fg="#555"
+        ).pack(anchor="w", padx=10)
+
+        self.obs_path_label = tk.Label(
+            obs_info_frame,
+            text=f"📁 {self.obs_dir}",
+            bg="#f0f0f0",
+            font=("Arial", 8),
+            fg="#3498db"
+        )
+        self.obs_path_label.pack(pady=(5, 0))
+
+        tk.Button(
+            obs_info_frame,
+            text="📂 Открыть папку OBS файлов",
+            command=self.open_obs_folder,
+            bg="#95a5a6",
+            fg="white",
+            font=("Arial", 9),
+            padx=8,
+            pady=3
+        ).pack(pady=(5, 5))
+
+        tk.Label(
+            self.root,
+            text="📋 Лог входа/выхода:",
+            bg="#f0f0f0",
+            font=("Arial", 10)
+        ).pack(pady=(10, 0))
+
+        self.log_text = scrolledtext.ScrolledText(
+            self.root,
+            font=("Consolas", 9),
+            height=8,
+            wrap=tk.WORD,
+            state="disabled"
+        )
+        self.log_text.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+        self.file_label = tk.Label(
+            self.root,
+            text="📁 JSON файл статистики: не создан",
+            bg="#f0f0f0",
+            fg="blue",
+            font=("Arial", 9)
+        )
+        self.file_label.pack(pady=(5, 10))
+
+    def restore_fields(self):
+        settings = load_settings()
+        self.channel_entry.insert(0, settings.get("channel", ""))
+        self.store.flush_interval = settings.get("flush_interval", 0)
+        self.store.snapshots = settings.get("snapshots", 0)
+        self.poll_interval = settings.get("poll_interval", 10)
+        self.event_log = settings.get("event_log", True)
+        self.compact_interval = settings.get("compact_interval", 300)
+        self.burst_threshold = settings.get("burst_threshold", BURST_THRESHOLD)
+        self.overlay_theme = settings.get("overlay_theme", "")
+        overlay_assets.set_theme(self.overlay_theme or config.settings_dir / "overlay_theme")
+
+    def log(self, message):
+        # Вызывается и из потоков мониторинга: строка только ставится
+        # в очередь, в окно её переносит LogPump из Tk-потока.
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.log_pump.put(f"[{timestamp}] {message}")
+
+    def open_obs_folder(self):
+        import subprocess
+        if sys.platform == 'win32':
+            os.startfile(self.obs_dir)
+        elif sys.platform == 'darwin':
+            subprocess.run(['open', self.obs_dir])
+        else:
+            subprocess.run(['xdg-open', self.obs_dir])
+
+    def web_server_files(self):
+        auth_url = ("http://localhost:8000/")
+        webbrowser.open(auth_url)
+
+    def auth_via_browser(self):
+        auth_url = (
+            f"https://id.twitch.tv/oauth2/authorize?"
+            f"client_id={config.CLIENT_ID}&"
+            f"redirect_uri={REDIRECT_URI}&"
+            f"response_type=token&"
+            f"scope={SCOPE}"
+        )
+        webbrowser.open(auth_url)
+        messagebox.showinfo(
+            "Инструкция",
+            "1. Войдите в Twitch под нужным аккаунтом\n"
+            "2. Разрешите доступ\n"
+            "3. Скопируйте токен из URL после #access_token=\n"
+            "4. Вставьте его в поле ввода ниже"
+        )
+
+        token = simpledialog.askstring(
+            "Ввод токена",
+            "Введите Access Token (после #access_token=):"
+        )
+
+        if token:
+            self.access_token = token.strip()
+            self.helix.access_token = self.access_token
+            self.status_label.config(text="✅ Авторизован", fg="green")
+            messagebox.showinfo("Успех", "Токен сохранён!")
+
+    def check_channel(self):
+        channel_name = self.channel_entry.get().strip()
+        if not channel_name:
+            messagebox.showwarning("Ошибка", "Введите имя канала!")
+            return
+
+        try:
+            user = self.helix.get_user(channel_name)
+            if user:
+                self.broadcaster_id = user["id"]
+                display_name = user.get("display_name", channel_name)
+                self.status_label.config(
+                    text=f"✅ Канал: {display_name} (ID: {self.broadcaster_id})",
+                    fg="green"
+                )
+                self.start_btn.config(state="normal")
+                self.log(f"✅ Канал найден: {display_name} (ID: {self.broadcaster_id})")
+            else:
+                raise Exception("Канал не найден")
+        except requests.exceptions.HTTPError as e:
+            self.status_label.config(text=f"❌ Ошибка API: {e}", fg="red")
+            self.log(f"❌ HTTP ошибка при проверке канала: {e}")
+        except requests.exceptions.RequestException as e:
+            self.status_label.config(text=f"❌ Сетевая ошибка: {e}", fg="red")
+            self.log(f"❌ Сетевая ошибка при проверке канала: {e}")
+        except Exception as e:
+            self.status_label.config(text=f"❌ Ошибка: {e}", fg="red")
+            self.log(f"❌ Ошибка проверки канала: {e}")
+
+    def start_monitoring(self):
+        if not self.broadcaster_id or not self.access_token:
+            messagebox.showwarning("Ошибка", "Сначала авторизуйтесь и проверьте канал!")
+            return
+        self.is_monitoring = True
+        self.start_btn.config(state="disabled")
+        self.stop_btn.config(state="normal")
+        self.open_browser_btn.config(state="normal")
+        self.status_label.config(text="📡 Мониторинг запущен...", fg="blue")
+        self.file_label.config(text=f"📁 Файл статистики: {self.store.path}")
+        self.log(f"📝 Лог-файл: {self.log_file}")
+        self.log(f"📊 Статистика: {self.store.path}")
+        self.log(f"📺 OBS файлы: {self.obs_dir}")
+        self.log(f"📺 WEB для OBS: http://localhost:8000/")
+        self.channel = ChannelMonitor(
+            self.helix,
+            self.channel_entry.get().strip().lower(),
+            self.broadcaster_id,
+            self.store,
+            obs_dir=self.obs_dir,
+            interval=self.poll_interval,
+            ignore=config.ignore_filter,
+            log=self.log,
+            on_http_error=self.on_http_error,
+            event_log=EventLog(config.settings_dir / "events") if self.event_log else None,
+            history=self.history,
+            burst_threshold=self.burst_threshold
+        )
+        self.engine = MonitorEngine(self.helix, interval=self.poll_interval, workers=1, log=self.log,
+                                    compact_interval=self.compact_interval)
+        self.engine.add_channel(self.channel)
+        self.engine.start()
+        self.log("✅ Страницы для OBS готовы")
+        if not self.web_server_started:
+            self.web_server_started = True
+            threading.Thread(target=web_server, args=(self.obs_dir,), daemon=True).start()
+
+    def on_http_error(self, status):
+        if status == 401:
+            self.root.after(0, lambda: self.status_label.config(
+                text="❌ Токен истек",
+                fg="red"
+            ))
+        elif status == 403:
+            self.root.after(0, lambda: messagebox.showerror(
+                "Ошибка доступа",
+                "Для чтения списка чаттеров нужно:\n"
+                "1. Быть модератором канала, ИЛИ\n"
+                "2. Авторизоваться под аккаунтом стримера\n\n"
+                "Scope: moderator:read:chatters"
+            ))
+
+    def stop_monitoring(self):
+        self.is_monitoring = False
+        self.log("💾 Сохранение данных перед выходом...")
+        if self.engine:
+            self.engine.stop()
+        self.start_btn.config(state="normal")
+        self.stop_btn.config(state="disabled")
+        self.status_label.config(text="⏸️ Мониторинг остановлен", fg="orange")
+        self.log("🛑 Мониторинг остановлен пользователем.")
+        if self.helix.stats:
+            self.log(f"⏱️ Helix API: {self.helix.latency_summary()}")
+        if self.channel and self.channel.scheduler.ticks:
+            self.log(f"⏱️ Опрос раз в {self.poll_interval} с: {self.channel.scheduler.summary()}")
+
+    def show_statistics(self):
+        if not len(self.store):
+            messagebox.showinfo("Статистика", "Данные отсутствуют.")
+            return
+        stats_window = tk.Toplevel(self.root)
+        stats_window.title("📊 Статистика чаттеров")
+        stats_window.geometry("950x650")
+        stats_window.configure(bg="#f5f5f5")
+        header_label = tk.Label(
+            stats_window,
+            text="📊 Статистика посетителей чата",
+            font=("Arial", 14, "bold"),
+            bg="#f5f5f5",
+            fg="#333"
+        )
+        header_label.pack(pady=(10, 5))
+        view = StatisticsView(stats_window, self.store, bg="#f5f5f5")
+        info_frame = tk.Frame(stats_window, bg="#f5f5f5")
+        info_label = tk.Label(
+            info_frame,
+            text="⏳ Загрузка статистики...",
+            font=("Arial", 10),
+            bg="#f5f5f5",
+            fg="#555"
+        )
+        info_label.pack(side=tk.LEFT)
+        hint_label = tk.Label(
+            info_frame,
+            text="💡 Клик на заголовок = сортировка",
+            font=("Arial", 9, "italic"),
+            bg="#f5f5f5",
+            fg="#888"
+        )
+        hint_label.pack(side=tk.RIGHT)
+
+        def update_info(table, rows):
+            totals = table.totals(rows)
+            median = table.percentiles("watch_time", (50,), rows)[50]
+            info_label.config(text=(
+                f"👥 Уникальных: {totals['users']}  |  🔄 Визитов: {totals['visits']}  |  "
+                f"⏱️ Общее время: {format_seconds(totals['watch_time'])}  |  📈 Медиана: {format_seconds(median)}"
+            ))
+
+        view.on_change = update_info
+        btn_frame = tk.Frame(stats_window, bg="#f5f5f5")
+        btn_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 10))
+        info_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=5)
+        view.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        def export_to_csv():
+            path = filedialog.asksaveasfilename(
+                parent=stats_window,
+                title="Экспорт статистики",
+                initialdir=str(config.settings_dir),
+                initialfile="chatters_export.csv",
+                defaultextension=".csv",
+                filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Parquet", "*.parquet")]
+            )
+            if not path:
+                return
+            export_btn.config(state="disabled", text="⏳ Экспорт...")
+
+            def on_progress(processed, total):
+                percent = processed * 100 // total if total else 100
+                self.root.after(0, lambda: export_btn.config(text=f"⏳ Экспорт {percent}%"))
+
+            def on_done(count, error):
+                def finish():
+                    if export_btn.winfo_exists():
+                        export_btn.config(state="normal", text="📁 Экспорт")
+                    if error:
+                        messagebox.showerror("Ошибка", f"Не удалось экспортировать: {error}")
+                    else:
+                        messagebox.showinfo("Экспорт", f"Экспортировано записей: {count}\n{path}")
+                self.root.after(0, finish)
+
+            ExportJob(self.store, path, on_progress=on_progress, on_done=on_done).start()
+
+        export_btn = tk.Button(
+            btn_frame,
+            text="📁 Экспорт",
+            command=export_to_csv,
+            bg="#3498db",
+            fg="white",
+            font=("Arial", 9),
+            padx=10,
+            pady=3
+        )
+        export_btn.pack(side=tk.LEFT, padx=5)
+        close_btn = tk.Button(
+            btn_frame,
+            text="❌ Закрыть",
+            command=self.web_server_files,
+            bg="#e74c3c",
+            fg="white",
+            font=("Arial", 9),
+            padx=10,
+            pady=3
+        )
+        close_btn.pack(side=tk.RIGHT, padx=5)
+
+    def on_closing(self):
+        if self.is_monitoring:
+            self.stop_monitoring()
+        self.store.flush(force=True)
+        save_settings({
+            "channel": self.channel_entry.get().strip(),
+            "ignored_bots": list(BOTS_TO_IGNORE),
+            "flush_interval": self.store.flush_interval,
+            "snapshots": self.store.snapshots,
+            "poll_interval": self.poll_interval,
+            "event_log": self.event_log,
+            "compact_interval": self.compact_interval,
+            "burst_threshold": self.burst_threshold,
+            "overlay_theme": self.overlay_theme,
+            "storage": self.store.backend
+        })
+        self.log_pump.close()
+        self.root.destroy()
+
+
+def run():
+    tk.ttk = tk_ttk
+    root = tk.Tk()
+    app = TwitchChatLogger(root)
+    root.protocol("WM_DELETE_WINDOW", app.on_closing)
+    root.mainloop()
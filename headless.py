@@ -0,0 +1,91 @@
+import logging
+import signal
+import sys
+import threading
+
+import requests
+
+import config
+from engine import BURST_THRESHOLD, MonitorEngine, create_channels
+from helix import HELIX_URL, HelixClient
+from overlay import overlay_assets, web_server
+
+logger = logging.getLogger("headless")
+
+
+def setup_logging(log_file=None):
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        handlers=handlers,
+        force=True
+    )
+
+
+def run(logins, interval: float = None, workers: int = 8, port: int = 8000, web: bool = True,
+        base_url: str = HELIX_URL, host: str = "127.0.0.1") -> int:
+    setup_logging(config.settings_dir / "headless.log")
+    settings = config.load_settings()
+    logins = logins or ([settings["channel"]] if settings.get("channel") else [])
+    interval = interval or settings.get("poll_interval", 10)
+    if not logins:
+        logger.error("❌ Не указан канал: --channel <имя>")
+        return 2
+    if not config.CLIENT_ID or not config.ACCESS_TOKEN:
+        logger.error("❌ В .env нет twitch_id или twitch_user_token")
+        return 2
+
+    helix = HelixClient(config.CLIENT_ID, config.ACCESS_TOKEN, pool_size=workers * 2,
+                        base_url=base_url)
+    channels_dir = config.settings_dir / "channels"
+    overlay_assets.set_theme(settings.get("overlay_theme") or config.settings_dir / "overlay_theme")
+    try:
+        channels = create_channels(helix, logins, channels_dir, interval=interval,
+                                   ignore=config.ignore_filter, log=logger.info,
+                                   storage=config.storage_backend,
+                                   event_log=settings.get("event_log", True))
+    except requests.exceptions.RequestException as e:
+        logger.error(f"❌ Не удалось получить каналы: {e}")
+        return 1
+    if not channels:
+        return 1
+
+    engine = MonitorEngine(helix, interval=interval, workers=workers, log=logger.info,
+                           compact_interval=settings.get("compact_interval", 300))
+    for channel in channels:
+        channel.store.flush_interval = settings.get("flush_interval", 0)
+        channel.store.snapshots = settings.get("snapshots", 0)
+        channel.burst_threshold = settings.get("burst_threshold", BURST_THRESHOLD)
+        engine.add_channel(channel)
+
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info(f"🛑 Получен сигнал {signal.Signals(signum).name}, остановка...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    logger.info(f"📡 Мониторинг {len(channels)} каналов, опрос раз в {interval} с")
+    engine.start()
+    if web:
+        # Наружу — только страницы OBS каналов: история, журнал и база
+        # в channels/ по сети недоступны.
+        mounts = {f"/{channel.login}/obs_stats/": channel.obs_dir for channel in channels}
+        threading.Thread(target=web_server, args=(channels_dir, port),
+                         kwargs={"host": host, "mounts": mounts}, daemon=True).start()
+        logger.info(f"📺 WEB для OBS: http://{host or 'localhost'}:{port}/<канал>/obs_stats/")
+    while not stop_event.wait(1):
+        pass
+
+    logger.info("💾 Сохранение данных перед выходом...")
+    engine.stop()
+    for channel in channels:
+        channel.store.close()
+    logger.info(f"⏱️ Helix API: {helix.latency_summary()}")
+    helix.close()
+    return 0
@@ -0,0 +1,173 @@
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+HELIX_URL = "https://api.twitch.tv/helix"
+CHATTERS_PAGE_SIZE = 1000
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+class CallStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_time = 0.0
+        self.last_time = 0.0
+
+    @property
+    def avg_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+
+class HelixClient:
+    # Один пул соединений на все вызовы Helix: keep-alive, таймауты,
+    # учёт Ratelimit-* заголовков и повторы 429/5xx с экспоненциальной паузой.
+    def __init__(self, client_id: str, access_token: str = "", base_url: str = HELIX_URL,
+                 timeout=(5, 15), max_retries: int = 3, backoff: float = 0.5,
+                 max_backoff: float = 8.0, pool_size: int = 8, session=None):
+        self.client_id = client_id
+        self.access_token = access_token
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = session or requests.Session()
+        if isinstance(self.session, requests.Session):
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        self.lock = threading.Lock()
+        self.ratelimit_remaining = None
+        self.ratelimit_reset = 0.0
+        self.stats = {}
+
+    @property
+    def headers(self) -> dict:
+        return {
+            "Client-ID": self.client_id,
+            "Authorization": f"Bearer {self.access_token}"
+        }
+
+    def close(self):
+        self.session.close()
+
+    def _throttle(self):
+        with self.lock:
+            remaining = self.ratelimit_remaining
+            reset = self.ratelimit_reset
+        if remaining is not None and remaining <= 1:
+            delay = min(reset - time.time(), self.max_backoff * 4)
+            if delay > 0:
+                logger.info("Helix rate limit исчерпан, пауза %.1f с", delay)
+                time.sleep(delay)
+
+    def _update_ratelimit(self, response):
+        remaining = response.headers.get("Ratelimit-Remaining")
+        reset = response.headers.get("Ratelimit-Reset")
+        with self.lock:
+            if remaining is not None and remaining.isdigit():
+                self.ratelimit_remaining = int(remaining)
+                metrics.helix_ratelimit_remaining.set(self.ratelimit_remaining)
+            if reset is not None and reset.isdigit():
+                self.ratelimit_reset = float(reset)
+
+    def _retry_delay(self, attempt: int, response=None) -> float:
+        if response is not None and response.status_code == 429:
+            reset = response.headers.get("Ratelimit-Reset", "")
+            if reset.isdigit():
+                return max(0.0, min(float(reset) - time.time(), self.max_backoff * 4))
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _record(self, endpoint: str, elapsed: float, error: bool = False, retry: bool = False, status: int = None):
+        metrics.helix_requests.inc(endpoint=endpoint, status=f"{status // 100}xx" if status else "error")
+        metrics.helix_request_seconds.observe(elapsed, endpoint=endpoint)
+        with self.lock:
+            stats = self.stats.setdefault(endpoint, CallStats())
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.last_time = elapsed
+            stats.errors += error
+            stats.retries += retry
+
+    def get(self, endpoint: str, params=None) -> dict:
+        url = f"{self.base_url}/{endpoint}"
+        attempt = 0
+        while True:
+            self._throttle()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=self.headers, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._record(endpoint, time.perf_counter() - started, error=True, retry=attempt < self.max_retries)
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._retry_delay(attempt))
+                attempt += 1
+                continue
+            elapsed = time.perf_counter() - started
+            self._update_ratelimit(response)
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self._record(endpoint, elapsed, error=True, retry=True, status=response.status_code)
+                delay = self._retry_delay(attempt, response)
+                logger.warning("Helix %s вернул %s, повтор через %.2f с", endpoint, response.status_code, delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._record(endpoint, elapsed, error=response.status_code >= 400, status=response.status_code)
+            response.raise_for_status()
+            return response.json()
+
+    def get_user(self, login: str):
+        data = self.get("users", {"login": login}).get("data", [])
+        return data[0] if data else None
+
+    def get_users(self, logins) -> dict:
+        logins = list(logins)
+        users = {}
+        for i in range(0, len(logins), 100):
+            params = [("login", login) for login in logins[i:i + 100]]
+            for user in self.get("users", params).get("data", []):
+                users[user["login"].lower()] = user
+        return users
+
+    def get_stream(self, broadcaster_id: str):
+        data = self.get("streams", {"user_id": broadcaster_id}).get("data", [])
+        return data[0] if data else None
+
+    def get_chatters(self, broadcaster_id: str, moderator_id: str = None):
+        # /chat/chatters отдаёт не больше 1000 пользователей за запрос,
+        # остальное — по курсору pagination.cursor.
+        params = {
+            "broadcaster_id": broadcaster_id,
+            "moderator_id": moderator_id or broadcaster_id,
+            "first": CHATTERS_PAGE_SIZE
+        }
+        chatters = set()
+        total = 0
+        while True:
+            payload = self.get("chat/chatters", params)
+            total = payload.get("total", total)
+            chatters.update(chatter["user_login"] for chatter in payload.get("data", []))
+            cursor = (payload.get("pagination") or {}).get("cursor")
+            if not cursor:
+                break
+            params["after"] = cursor
+        return chatters, total
+
+    def latency_summary(self) -> str:
+        with self.lock:
+            items = sorted(self.stats.items())
+        return ", ".join(
+            f"{endpoint}: {stats.calls} выз., ср. {stats.avg_time * 1000:.0f} мс, ошибок {stats.errors}"
+            for endpoint, stats in items
+        )
@@ -0,0 +1,203 @@
+import bisect
+import itertools
+import logging
+import operator
+import threading
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SESSION_COLUMNS = (("user", "I"), ("enter", "q"), ("exit", "q"), ("stream", "q"))
+BUCKET_COLUMNS = (("minute", "q"), ("peak", "I"), ("total", "I"), ("samples", "I"))
+BUCKET_SECONDS = 60
+
+
+def stream_id(started_at: str) -> int:
+    # Стрим опознаётся по времени начала из Helix (started_at), 0 — оффлайн.
+    if not started_at:
+        return 0
+    try:
+        return int(datetime.fromisoformat(started_at.replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return 0
+
+
+def epoch(value) -> int:
+    return int(value.timestamp()) if isinstance(value, datetime) else int(value)
+
+
+def load_columns(directory: Path, prefix: str, columns) -> dict:
+    # Каждая колонка — отдельный файл, читается одним array.frombytes.
+    arrays = {}
+    for name, typecode in columns:
+        path = directory / f"{prefix}.{name}.bin"
+        values = array(typecode)
+        if path.exists():
+            raw = path.read_bytes()
+            values.frombytes(raw[:len(raw) - len(raw) % values.itemsize])
+        arrays[name] = values
+    rows = min(len(values) for values in arrays.values())
+    for name, typecode in columns:
+        values = arrays[name]
+        if len(values) != rows:
+            # Недописанный хвост после сбоя отбрасывается.
+            logger.warning("Обрезан хвост %s.%s.bin: %s записей", prefix, name, len(values) - rows)
+            del values[rows:]
+            with open(directory / f"{prefix}.{name}.bin", "r+b") as f:
+                f.truncate(rows * values.itemsize)
+    return arrays
+
+
+def append_columns(directory: Path, prefix: str, columns, rows):
+    for index, (name, typecode) in enumerate(columns):
+        with open(directory / f"{prefix}.{name}.bin", "ab") as f:
+            f.write(array(typecode, (row[index] for row in rows)).tobytes())
+
+
+class SessionHistory:
+    # Визиты (пользователь, вход, выход, стрим) и поминутная посещаемость
+    # в колонках array: на диске — дописываемые файлы по колонке,
+    # в памяти — массивы, упорядоченные по времени выхода, для bisect.
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.users_file = self.directory / "users.txt"
+        self.lock = threading.Lock()
+        self.usernames = []
+        self.user_ids = {}
+        self.stream_index = None
+        self.current = None
+        self.load()
+
+    def load(self):
+        if self.users_file.exists():
+            self.usernames = self.users_file.read_text(encoding="utf-8").splitlines()
+            self.user_ids = {username: index for index, username in enumerate(self.usernames)}
+        self.sessions = load_columns(self.directory, "sessions", SESSION_COLUMNS)
+        self.buckets = load_columns(self.directory, "concurrency", BUCKET_COLUMNS)
+        exits = self.sessions["exit"]
+        if not all(map(operator.le, exits, itertools.islice(exits, 1, None))):
+            # Запоздавшие визиты (после восстановления) дописаны в конец файла.
+            order = sorted(range(len(exits)), key=exits.__getitem__)
+            for name, typecode in SESSION_COLUMNS:
+                column = self.sessions[name]
+                self.sessions[name] = array(typecode, (column[index] for index in order))
+        self.max_duration = max(map(operator.sub, self.sessions["exit"], self.sessions["enter"]), default=0)
+
+    def __len__(self):
+        return len(self.sessions["exit"])
+
+    def user_id(self, username: str, new_users: list) -> int:
+        index = self.user_ids.get(username)
+        if index is None:
+            index = len(self.usernames)
+            self.usernames.append(username)
+            self.user_ids[username] = index
+            new_users.append(username)
+        return index
+
+    def insert_row(self, row: tuple):
+        exits = self.sessions["exit"]
+        if exits and row[2] < exits[-1]:
+            position = bisect.bisect_right(exits, row[2])
+            for (name, _), value in zip(SESSION_COLUMNS, row):
+                self.sessions[name].insert(position, value)
+            self.stream_index = None
+        else:
+            for (name, _), value in zip(SESSION_COLUMNS, row):
+                self.sessions[name].append(value)
+            if self.stream_index is not None:
+                self.stream_index.setdefault(row[3], array("I")).append(len(exits) - 1)
+        self.max_duration = max(self.max_duration, row[2] - row[1])
+
+    def add_sessions(self, sessions):
+        # sessions: (username, вход, выход, stream_id); на диск дописываются
+        # только новые записи, так что стоимость тика — число выходов.
+        new_users = []
+        rows = []
+        with self.lock:
+            for username, entered, exited, stream in sessions:
+                row = (self.user_id(username, new_users), epoch(entered), epoch(exited), stream)
+                self.insert_row(row)
+                rows.append(row)
+            if new_users:
+                with open(self.users_file, "a", encoding="utf-8") as f:
+                    f.write("".join(username + "\n" for username in new_users))
+            if rows:
+                append_columns(self.directory, "sessions", SESSION_COLUMNS, rows)
+
+    def sample(self, now, online: int):
+        # Посещаемость копится в текущей минуте и пишется при её смене.
+        minute = epoch(now) // BUCKET_SECONDS * BUCKET_SECONDS
+        with self.lock:
+            if self.current and self.current[0] != minute:
+                self.close_bucket()
+            if self.current is None:
+                self.current = [minute, online, online, 1]
+            else:
+                self.current[1] = max(self.current[1], online)
+                self.current[2] += online
+                self.current[3] += 1
+
+    def close_bucket(self):
+        row, self.current = tuple(self.current), None
+        for (name, _), value in zip(BUCKET_COLUMNS, row):
+            self.buckets[name].append(value)
+        append_columns(self.directory, "concurrency", BUCKET_COLUMNS, [row])
+
+    def flush(self):
+        with self.lock:
+            if self.current:
+                self.close_bucket()
+
+    def session_row(self, index: int) -> tuple:
+        sessions = self.sessions
+        return (self.usernames[sessions["user"][index]], sessions["enter"][index],
+                sessions["exit"][index], sessions["stream"][index])
+
+    def sessions_between(self, start, end) -> list:
+        # Визиты, пересекающие [start, end): выход > start и вход < end.
+        # Визит длиннее max_duration невозможен, поэтому скан ограничен.
+        start, end = epoch(start), epoch(end)
+        with self.lock:
+            exits, enters = self.sessions["exit"], self.sessions["enter"]
+            first = bisect.bisect_right(exits, start)
+            last = bisect.bisect_left(exits, end + self.max_duration + 1)
+            return [self.session_row(index) for index in range(first, last) if enters[index] < end]
+
+    def build_stream_index(self) -> dict:
+        if self.stream_index is None:
+            self.stream_index = {}
+            for index, stream in enumerate(self.sessions["stream"]):
+                self.stream_index.setdefault(stream, array("I")).append(index)
+        return self.stream_index
+
+    def streams(self) -> list:
+        with self.lock:
+            return sorted(stream for stream in self.build_stream_index() if stream)
+
+    def stream_viewers(self, stream: int) -> dict:
+        # Кто смотрел стрим и сколько секунд в сумме.
+        viewers = {}
+        with self.lock:
+            users, enters, exits = self.sessions["user"], self.sessions["enter"], self.sessions["exit"]
+            for index in self.build_stream_index().get(stream, ()):
+                username = self.usernames[users[index]]
+                viewers[username] = viewers.get(username, 0) + exits[index] - enters[index]
+        return viewers
+
+    def concurrency(self, start, end) -> list:
+        # (начало минуты, пик, среднее) за [start, end).
+        start, end = epoch(start), epoch(end)
+        with self.lock:
+            minutes = self.buckets["minute"]
+            first = bisect.bisect_left(minutes, start // BUCKET_SECONDS * BUCKET_SECONDS)
+            last = bisect.bisect_left(minutes, end)
+            peaks, totals, samples = self.buckets["peak"], self.buckets["total"], self.buckets["samples"]
+            buckets = [(minutes[index], peaks[index], totals[index] / samples[index]) for index in range(first, last)]
+            if self.current and start <= self.current[0] < end:
+                minute, peak, total, count = self.current
+                buckets.append((minute, peak, total / count))
+        return buckets
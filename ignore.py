@@ -0,0 +1,56 @@
+import fnmatch
+import logging
+import re
+
+GLOB_CHARS = set("*?[")
+
+logger = logging.getLogger(__name__)
+
+
+class IgnoreFilter:
+    # Список игнорируемых ботов, скомпилированный один раз: точные имена
+    # в множестве, маски (*bot) и регулярки (re:^bot_\d+$) в одном регэкспе.
+    # Пересобирается только через compile() при изменении настроек.
+    def __init__(self, patterns=()):
+        self.compile(patterns)
+
+    def compile(self, patterns):
+        names = set()
+        expressions = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern:
+                continue
+            if pattern.startswith("re:"):
+                # Тело регулярки не приводим к нижнему регистру: \D и \d
+                # значат разное, регистр снимает re.IGNORECASE. Битая
+                # регулярка из настроек пропускается, а не роняет запуск.
+                expression = f"(?:{pattern[3:]})"
+                try:
+                    re.compile(expression, re.IGNORECASE)
+                except re.error as e:
+                    logger.warning("Некорректная регулярка в ignored_bots %r: %s", pattern, e)
+                    continue
+                expressions.append(expression)
+                continue
+            pattern = pattern.lower()
+            if GLOB_CHARS & set(pattern):
+                expressions.append(fnmatch.translate(pattern))
+            else:
+                names.add(pattern)
+        regex = re.compile("|".join(expressions), re.IGNORECASE) if expressions else None
+        self.compiled = (frozenset(names), regex)
+
+    def __call__(self, username: str) -> bool:
+        names, regex = self.compiled
+        username = username.lower()
+        return username in names or bool(regex and regex.match(username))
+
+    def filter(self, usernames) -> set:
+        # Логины Twitch (user_login) всегда в нижнем регистре,
+        # поэтому точные имена отсекаются одной разностью множеств.
+        names, regex = self.compiled
+        kept = set(usernames) - names
+        if regex:
+            kept = {username for username in kept if not regex.match(username)}
+        return kept
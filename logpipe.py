@@ -0,0 +1,134 @@
+import logging
+import logging.handlers
+import os
+import queue
+import time
+import tkinter as tk
+
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+LOG_FLUSH_INTERVAL = 1.0
+GUI_MAX_LINES = 2000
+PUMP_INTERVAL = 100
+
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    # Файл открыт всё время, строки копятся в буфере и сбрасываются раз
+    # в flush_interval секунд или сразу на WARNING и выше. Размер для
+    # ротации считаем сами: tell() у текстового файла сбрасывал бы буфер.
+    def __init__(self, filename, max_bytes: int = LOG_MAX_BYTES, backups: int = LOG_BACKUPS,
+                 flush_interval: float = LOG_FLUSH_INTERVAL):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        self.flush_interval = flush_interval
+        self.flushed_at = time.monotonic()
+        self.size = 0
+
+    def _open(self):
+        stream = super()._open()
+        try:
+            self.size = os.path.getsize(self.baseFilename)
+        except OSError:
+            self.size = 0
+        return stream
+
+    def shouldRollover(self, record) -> bool:
+        return self.maxBytes > 0 and self.stream is not None and self.size >= self.maxBytes
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            text = self.format(record) + self.terminator
+            self.stream.write(text)
+            self.size += len(text.encode("utf-8"))
+            if record.levelno >= logging.WARNING or time.monotonic() - self.flushed_at >= self.flush_interval:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.flushed_at = time.monotonic()
+        super().flush()
+
+
+class LogPump:
+    # Строки лога из любых потоков копятся в очереди, а в виджет их
+    # переносит root.after() пачками: одна вставка на пачку и не больше
+    # max_lines строк в окне. В файл строки уходят через буферизованный
+    # обработчик с ротацией прямо из потока, который пишет лог.
+    def __init__(self, widget, log_file=None, max_lines: int = GUI_MAX_LINES, interval: int = PUMP_INTERVAL):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.interval = interval
+        self.queue = queue.SimpleQueue()
+        self.lines = 0
+        self.after_id = None
+        self.logger = logging.getLogger(f"{__name__}.{id(self)}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.file_handler = None
+        if log_file:
+            self.file_handler = BufferedRotatingFileHandler(log_file)
+            self.file_handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(self.file_handler)
+        self.logger.addHandler(logging.handlers.QueueHandler(self.queue))
+
+    def put(self, line: str, level: int = logging.INFO):
+        self.logger.log(level, line)
+
+    def start(self):
+        self.after_id = self.widget.after(self.interval, self.drain)
+
+    def drain(self):
+        lines = []
+        try:
+            while True:
+                lines.append(self.queue.get_nowait().getMessage())
+        except queue.Empty:
+            pass
+        if lines:
+            self.show(lines)
+        if self.file_handler:
+            self.file_handler.acquire()
+            try:
+                if self.file_handler.stream and time.monotonic() - self.file_handler.flushed_at >= LOG_FLUSH_INTERVAL:
+                    self.file_handler.flush()
+            finally:
+                self.file_handler.release()
+        try:
+            self.after_id = self.widget.after(self.interval, self.drain)
+        except tk.TclError:
+            self.after_id = None
+
+    def show(self, lines):
+        # Из пачки в окно попадает только то, что в нём останется:
+        # строка-отметка и последние max_lines - 1 строк.
+        if len(lines) > self.max_lines:
+            skipped = len(lines) - (self.max_lines - 1)
+            lines = [f"… пропущено строк: {skipped}"] + lines[skipped:]
+        widget = self.widget
+        try:
+            widget.config(state="normal")
+            widget.insert(tk.END, "\n".join(lines) + "\n")
+            self.lines += len(lines)
+            if self.lines > self.max_lines:
+                widget.delete("1.0", f"{self.lines - self.max_lines + 1}.0")
+                self.lines = self.max_lines
+            widget.see(tk.END)
+            widget.config(state="disabled")
+        except tk.TclError:
+            pass
+
+    def close(self):
+        if self.after_id:
+            try:
+                self.widget.after_cancel(self.after_id)
+            except tk.TclError:
+                pass
+            self.after_id = None
+        if self.file_handler:
+            self.logger.removeHandler(self.file_handler)
+            self.file_handler.close()
+            self.file_handler = None
@@ -0,0 +1,150 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Границы корзин гистограмм в секундах: от долей миллисекунды
+# (дифф небольшого чата) до десятков секунд (запрос Helix с повторами).
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    # Значения хранятся по кортежу меток в порядке label_names.
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self.lock:
+            self.values[self.key(labels)] = value
+
+
+class Histogram(Metric):
+    # На набор меток: счётчики по корзинам (не накопительные), сумма
+    # и число наблюдений; накопительными они становятся только в render().
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self.key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self.values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.label_names, key, le)} {cumulative}")
+            labels = format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def add(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        # Текстовый формат Prometheus (text/plain; version=0.0.4).
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+registry = MetricsRegistry()
+
+tick_stage_seconds = registry.add(Histogram(
+    "twcl_tick_stage_seconds", "Время этапа тика: fetch, diff, persist, overlay, log",
+    labels=("channel", "stage")))
+tick_seconds = registry.add(Histogram(
+    "twcl_tick_seconds", "Полное время тика канала", labels=("channel",)))
+ticks_skipped = registry.add(Counter(
+    "twcl_ticks_skipped_total", "Тики, пропущенные из-за занятого канала", labels=("channel",)))
+helix_requests = registry.add(Counter(
+    "twcl_helix_requests_total", "Запросы к Helix по классу ответа (2xx, 4xx, 5xx, error)",
+    labels=("endpoint", "status")))
+helix_request_seconds = registry.add(Histogram(
+    "twcl_helix_request_seconds", "Время одного запроса к Helix", labels=("endpoint",)))
+helix_ratelimit_remaining = registry.add(Gauge(
+    "twcl_helix_ratelimit_remaining", "Остаток rate limit Helix (Ratelimit-Remaining)"))
+chatters_online = registry.add(Gauge(
+    "twcl_chatters_online", "Чаттеров в чате на последнем тике", labels=("channel",)))
+chatters_total = registry.add(Gauge(
+    "twcl_chatters_total", "Число чаттеров по данным Helix (поле total)", labels=("channel",)))
+chatters_joins = registry.add(Counter(
+    "twcl_chatters_joins_total", "Входы в чат", labels=("channel",)))
+chatters_leaves = registry.add(Counter(
+    "twcl_chatters_leaves_total", "Выходы из чата", labels=("channel",)))
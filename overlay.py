@@ -0,0 +1,526 @@
+import collections
+import gzip
+import hashlib
+import http.server
+import json
+import logging
+import mimetypes
+import sys
+import threading
+import time
+import traceback
+import urllib.parse
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+import metrics
+from config import resource_path
+from storage import atomic_write_bytes, atomic_write_text, format_seconds
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def redirect_stdout_stderr_to_file(log_path):
+    log_path = Path(log_path)
+    try:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+    except Exception:
+        pass
+
+    orig_stdout = sys.stdout
+    orig_stderr = sys.stderr
+    f = None
+    try:
+        f = open(str(log_path), "a", encoding="utf-8")
+        sys.stdout = f
+        sys.stderr = f
+        yield
+    except Exception:
+        try:
+            orig_stderr.write("Failed to redirect stdout/stderr:\n")
+            orig_stderr.write(traceback.format_exc() + "\n")
+        except Exception:
+            pass
+        yield
+    finally:
+        try:
+            if f:
+                f.flush()
+                f.close()
+        except Exception:
+            pass
+        sys.stdout = orig_stdout
+        sys.stderr = orig_stderr
+
+
+ASSETS_DIR = "overlay_assets"
+ASSET_CHECK_INTERVAL = 2
+# Файлы с версией в адресе (overlay.js?v=...) не меняются никогда,
+# HTML же каждый раз перепроверяется по ETag.
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Явно, а не только через mimetypes: на Windows реестр иногда отдаёт
+# для .js text/plain, и браузер отказывается выполнять скрипт.
+CONTENT_TYPES = {".html": "text/html", ".js": "text/javascript", ".css": "text/css",
+                 ".json": "application/json", ".svg": "image/svg+xml"}
+COMPRESSIBLE_TYPES = ("text/", "application/json", "image/svg+xml")
+
+
+class OverlayAsset:
+    def __init__(self, name: str, body: bytes):
+        self.name = name
+        self.body = body
+        self.content_type = (CONTENT_TYPES.get(Path(name).suffix.lower())
+                             or mimetypes.guess_type(name)[0] or "application/octet-stream")
+        if self.content_type.startswith("text/"):
+            self.content_type += "; charset=utf-8"
+        compressible = self.content_type.startswith(COMPRESSIBLE_TYPES)
+        self.gzipped = gzip.compress(body, compresslevel=9) if compressible else None
+        self.digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.etag = '"' + self.digest + '"'
+
+
+class OverlayAssets:
+    # Страницы оверлеев — статические файлы из overlay_assets/, поверх
+    # которых ложатся файлы темы пользователя (те же имена или новые).
+    # Всё читается в память один раз; тема перечитывается, только когда
+    # в её папке что-то поменялось, без перезапуска и без генерации.
+    def __init__(self, builtin_dir, theme_dir=None):
+        self.builtin_dir = Path(builtin_dir)
+        self.theme_dir = Path(theme_dir) if theme_dir else None
+        self.lock = threading.Lock()
+        self.assets = None
+        self.served = {}
+        self.theme_state = None
+        self.checked = 0
+
+    def set_theme(self, theme_dir):
+        with self.lock:
+            self.theme_dir = Path(theme_dir) if theme_dir else None
+            self.assets = None
+
+    def scan_theme(self) -> tuple:
+        if not self.theme_dir or not self.theme_dir.is_dir():
+            return ()
+        return tuple(sorted((path.name, path.stat().st_mtime_ns, path.stat().st_size)
+                            for path in self.theme_dir.iterdir() if path.is_file()))
+
+    def load(self):
+        files = {}
+        for directory in (self.builtin_dir, self.theme_dir):
+            if directory and directory.is_dir():
+                for path in directory.iterdir():
+                    if path.is_file() and not path.name.startswith("."):
+                        files[path.name] = path.read_bytes()
+        self.assets = {name: OverlayAsset(name, body) for name, body in files.items()}
+        # По сети HTML ссылается на скрипты и стили с хэшем в адресе,
+        # поэтому их можно кэшировать навсегда: новая версия — новый адрес.
+        self.served = dict(self.assets)
+        for name, asset in self.assets.items():
+            if name.endswith(".html"):
+                body = asset.body
+                for other in self.assets.values():
+                    if not other.name.endswith(".html"):
+                        for quote in (b'"', b"'"):
+                            reference = quote + other.name.encode("utf-8") + quote
+                            versioned = quote + other.name.encode("utf-8") + b"?v=" + other.digest.encode() + quote
+                            body = body.replace(reference, versioned)
+                self.served[name] = OverlayAsset(name, body)
+        self.checked = time.monotonic()
+        self.theme_state = self.scan_theme()
+        if self.theme_dir and self.theme_state:
+            logger.info("🎨 Тема оверлеев: %s (%s файлов)", self.theme_dir, len(self.theme_state))
+
+    def refresh(self):
+        if self.assets is None:
+            self.load()
+        elif self.theme_dir and time.monotonic() - self.checked >= ASSET_CHECK_INTERVAL:
+            self.checked = time.monotonic()
+            if self.scan_theme() != self.theme_state:
+                self.load()
+
+    def get(self, name: str):
+        # Версия для веб-сервера (со ссылками ?v=хэш).
+        with self.lock:
+            self.refresh()
+            return self.served.get(name)
+
+    def install(self, obs_dir) -> int:
+        # Копии для сцен, открывающих страницы как файлы (file://):
+        # пишутся только отличающиеся файлы, так что обычный запуск
+        # не трогает диск.
+        obs_dir = Path(obs_dir)
+        with self.lock:
+            self.refresh()
+            assets = list(self.assets.values())
+        written = 0
+        for asset in assets:
+            path = obs_dir / asset.name
+            try:
+                if path.read_bytes() == asset.body:
+                    continue
+            except OSError:
+                pass
+            atomic_write_bytes(path, asset.body)
+            written += 1
+        if written:
+            logger.info("📁 Обновлено файлов оверлеев в %s: %s", obs_dir, written)
+        return written
+
+
+overlay_assets = OverlayAssets(resource_path(ASSETS_DIR))
+
+
+def install_overlay_assets(obs_dir):
+    obs_dir = Path(obs_dir)
+    obs_dir.mkdir(parents=True, exist_ok=True)
+    return overlay_assets.install(obs_dir)
+
+
+def build_obs_data(top, chatters, stream_info, ignore, chatters_total: int = 0) -> dict:
+    top_viewers = [
+        {
+            "name": username,
+            "time": format_seconds(user_data.get("total_watch_time", 0)),
+            "visits": user_data.get("visits", 0)
+        }
+        for username, user_data in top
+    ]
+    return {
+        "viewer_count": stream_info.get("viewer_count", 0) if stream_info else 0,
+        "game_name": stream_info.get("game_name", "") if stream_info else "",
+        "title": stream_info.get("title", "") if stream_info else "",
+        "is_live": stream_info.get("is_live", False) if stream_info else False,
+        "chatters_count": len(chatters) if chatters else 0,
+        "chatters_total": chatters_total,
+        "chatters": sorted(ignore.filter(chatters)) if chatters else [],
+        "top_viewers": top_viewers,
+        "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+SSE_KEEPALIVE = 15
+DELTA_HISTORY = 64
+
+
+def dump_json(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def make_delta(previous: "OverlaySnapshot", current: "OverlaySnapshot") -> dict:
+    # Изменения между двумя версиями: входы/выходы по списку чаттеров
+    # и остальные поля (включая топ) целиком, только если они изменились.
+    delta = {
+        "version": current.version,
+        "base": previous.version,
+        "delta": True,
+        "joins": sorted(current.chatters - previous.chatters),
+        "leaves": sorted(previous.chatters - current.chatters)
+    }
+    for field, value in current.data.items():
+        if field not in ("version", "chatters") and previous.data.get(field) != value:
+            delta[field] = value
+    return delta
+
+
+def merge_deltas(deltas) -> dict:
+    merged = {"version": deltas[-1]["version"], "base": deltas[0]["base"], "delta": True}
+    joins, leaves = set(), set()
+    for delta in deltas:
+        for username in delta["joins"]:
+            if username in leaves:
+                leaves.discard(username)
+            else:
+                joins.add(username)
+        for username in delta["leaves"]:
+            if username in joins:
+                joins.discard(username)
+            else:
+                leaves.add(username)
+        merged.update((key, value) for key, value in delta.items()
+                      if key not in ("version", "base", "delta", "joins", "leaves"))
+    merged["joins"] = sorted(joins)
+    merged["leaves"] = sorted(leaves)
+    return merged
+
+
+class OverlaySnapshot:
+    # Готовый ответ для obs_data.json: тело сериализуется и сжимается
+    # один раз на тик, а не на каждый запрос каждой сцены.
+    def __init__(self, obs_data: dict, version: int = 0):
+        self.version = version
+        self.data = dict(obs_data, version=version)
+        self.chatters = frozenset(self.data.get("chatters") or ())
+        self.body = dump_json(self.data)
+        self.gzipped = gzip.compress(self.body, compresslevel=5)
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=12).hexdigest() + '"'
+        self.event = b"id: %d\ndata: %s\n\n" % (version, self.body)
+
+
+class OverlayCache:
+    # Последние obs_data.json всех каналов в памяти, ключ — путь файла,
+    # плюс DELTA_HISTORY последних изменений, чтобы отставшему клиенту
+    # отправить дельту вместо полного списка чаттеров.
+    # SSE-подписчики ждут на condition и просыпаются после каждого тика.
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.snapshots = {}
+        self.deltas = {}
+        self.version = 0
+
+    def publish(self, path, obs_data: dict) -> OverlaySnapshot:
+        path = Path(path).resolve()
+        with self.condition:
+            self.version += 1
+            version = self.version
+            previous = self.snapshots.get(path)
+        snapshot = OverlaySnapshot(obs_data, version)
+        delta = make_delta(previous, snapshot) if previous else None
+        with self.condition:
+            self.snapshots[path] = snapshot
+            history = self.deltas.setdefault(path, collections.deque(maxlen=DELTA_HISTORY))
+            if delta is None:
+                history.clear()
+            else:
+                history.append((delta, b"event: delta\nid: %d\ndata: %s\n\n" % (version, dump_json(delta))))
+            self.condition.notify_all()
+        return snapshot
+
+    def get(self, path):
+        with self.condition:
+            return self.snapshots.get(Path(path).resolve())
+
+    def since(self, path, version: int) -> tuple:
+        # (снимок, дельта от version, готовое SSE-событие или None).
+        # Дельта None — клиент отстал дальше истории или версия неизвестна,
+        # ему нужен полный снимок.
+        path = Path(path).resolve()
+        with self.condition:
+            snapshot = self.snapshots.get(path)
+            history = list(self.deltas.get(path, ()))
+        if snapshot is None or not version:
+            return snapshot, None, None
+        if version == snapshot.version:
+            return snapshot, {"version": version, "base": version, "delta": True, "joins": [], "leaves": []}, None
+        newer = [item for item in history if item[0]["version"] > version]
+        if not newer or newer[0][0]["base"] != version:
+            return snapshot, None, None
+        if len(newer) == 1:
+            return snapshot, newer[0][0], newer[0][1]
+        return snapshot, merge_deltas([delta for delta, _ in newer]), None
+
+    def event_since(self, path, version: int) -> tuple:
+        # (новая версия клиента, SSE-событие для него).
+        snapshot, delta, event = self.since(path, version)
+        if delta is None:
+            return snapshot.version, snapshot.event
+        if event is None:
+            event = b"event: delta\nid: %d\ndata: %s\n\n" % (delta["version"], dump_json(delta))
+        return snapshot.version, event
+
+    def newer(self, path: Path, version: int):
+        snapshot = self.snapshots.get(path)
+        return snapshot if snapshot is not None and snapshot.version > version else None
+
+    def wait(self, path, version: int, timeout: float = SSE_KEEPALIVE):
+        # Снимок новее version или None по таймауту.
+        path = Path(path).resolve()
+        with self.condition:
+            self.condition.wait_for(lambda: self.newer(path, version), timeout)
+            return self.newer(path, version)
+
+
+overlay_cache = OverlayCache()
+
+
+def write_obs_data(path, obs_data: dict):
+    # Файл остаётся для сцен, открывающих оверлей локально (file://),
+    # веб-сервер же отдаёт снимок из памяти.
+    snapshot = overlay_cache.publish(path, obs_data)
+    atomic_write_text(path, snapshot.body.decode("utf-8"), fsync=False)
+
+
+class OverlayRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # Страницы и скрипты — из overlay_assets в памяти, obs_data.json —
+    # из overlay_cache; всё с ETag/If-None-Match, gzip и keep-alive.
+    # Остальные файлы (логи, картинки пользователя) — с диска.
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело уходят разными send(): без TCP_NODELAY keep-alive
+    # упирается в задержку Nagle + delayed ACK (~40 мс на запрос).
+    disable_nagle_algorithm = True
+    cache = overlay_cache
+    assets = overlay_assets
+    # {"/<канал>/obs_stats/": папка}: если задано, раздаются только эти
+    # папки, а всё остальное (история, журнал, база) — 404.
+    mounts = None
+
+    def translate_path(self, path):
+        if self.mounts is None:
+            return super().translate_path(path)
+        url_path = urllib.parse.unquote(urllib.parse.urlsplit(path).path)
+        for prefix, directory in self.mounts.items():
+            if url_path.startswith(prefix) or url_path + "/" == prefix:
+                words = [word for word in url_path[len(prefix):].split("/") if word]
+                if any(word in (".", "..") or "\\" in word or ":" in word for word in words):
+                    return ""
+                translated = str(Path(directory, *words))
+                return translated + "/" if url_path.endswith("/") and words else translated
+        return ""
+
+    def mounted(self) -> bool:
+        path = self.path.split("?")[0]
+        return self.mounts is None or path == "/metrics" or bool(self.translate_path(self.path))
+
+    def do_GET(self):
+        if not self.mounted():
+            self.send_error(404)
+        elif self.path.split("?")[0] == "/metrics":
+            self.send_metrics()
+        elif self.path.split("?")[0].endswith("/events"):
+            self.send_events()
+        elif not self.send_snapshot(head=False) and not self.send_asset(head=False):
+            super().do_GET()
+
+    def do_HEAD(self):
+        if not self.mounted():
+            self.send_error(404)
+        elif not self.send_snapshot(head=True) and not self.send_asset(head=True):
+            super().do_HEAD()
+
+    def send_cached(self, item, content_type: str, cache_control: str, head: bool):
+        # item — OverlaySnapshot или OverlayAsset: body, gzipped, etag.
+        if item.etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self.send_header("ETag", item.etag)
+            self.send_header("Cache-Control", cache_control)
+            self.end_headers()
+            return
+        body = item.body
+        gzipped = item.gzipped is not None and "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            body = item.gzipped
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", item.etag)
+        self.send_header("Cache-Control", cache_control)
+        if item.gzipped is not None:
+            self.send_header("Vary", "Accept-Encoding")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def send_asset(self, head: bool) -> bool:
+        url = urllib.parse.urlsplit(self.path)
+        name = urllib.parse.unquote(url.path.rsplit("/", 1)[-1])
+        asset = self.assets.get(name) if name else None
+        if asset is None:
+            return False
+        versioned = "v=" in url.query and not name.endswith(".html")
+        self.send_cached(asset, asset.content_type, IMMUTABLE_CACHE if versioned else "no-cache", head)
+        return True
+
+    def send_snapshot(self, head: bool) -> bool:
+        path = self.translate_path(self.path)
+        if not path.endswith("obs_data.json"):
+            return False
+        since = self.since_version()
+        if since:
+            snapshot, delta, _ = self.cache.since(path, since)
+            if delta is not None:
+                # ?since=N: только изменения после версии N, если они ещё
+                # в истории; иначе ниже уйдёт полный снимок.
+                self.send_body(dump_json(delta), head)
+                return True
+        else:
+            snapshot = self.cache.get(path)
+        if snapshot is None:
+            return False
+        self.send_cached(snapshot, "application/json; charset=utf-8", "no-cache", head)
+        return True
+
+    def since_version(self) -> int:
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        try:
+            return int(query.get("since", ["0"])[0])
+        except ValueError:
+            return 0
+
+    def send_body(self, body: bytes, head: bool):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def send_metrics(self):
+        body = metrics.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        # Server-Sent Events: текущий снимок сразу, дальше после каждого
+        # тика — дельта от версии клиента (event: delta), а если он отстал
+        # дальше истории дельт — снова полный снимок. В паузах комментарий-пинг,
+        # чтобы прокси не рвали связь.
+        data_path = Path(self.translate_path(self.path.split("?")[0])).with_name("obs_data.json")
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")
+        self.end_headers()
+        version = 0
+        snapshot = self.cache.get(data_path)
+        try:
+            while True:
+                if snapshot is not None and snapshot.version > version:
+                    version, event = self.cache.event_since(data_path, version)
+                    self.wfile.write(event)
+                else:
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+                snapshot = self.cache.wait(data_path, version)
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            pass
+
+
+class OverlayServer(http.server.ThreadingHTTPServer):
+    # Поток на соединение: медленный клиент не задерживает остальные сцены.
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def web_server(directory, port: int = 8000, log_file=None, host: str = "", mounts: dict = None):
+    directory = Path(directory)
+    log_file = log_file or directory / "web_server.log"
+    handler = partial(OverlayRequestHandler, directory=str(directory))
+    if mounts is not None:
+        handler = partial(type("MountedRequestHandler", (OverlayRequestHandler,), {"mounts": dict(mounts)}),
+                          directory=str(directory))
+    with redirect_stdout_stderr_to_file(log_file):
+        try:
+            print(f"Веб-сервер: раздаёт {', '.join(mounts) if mounts else directory} на {host or '*'}:{port}")
+            with OverlayServer((host, port), handler) as httpd:
+                print(f"Сервер запущен на порту {port}, лог: {log_file}")
+                try:
+                    httpd.serve_forever()
+                except KeyboardInterrupt:
+                    print("Остановка сервера по KeyboardInterrupt")
+                finally:
+                    try:
+                        httpd.server_close()
+                    except Exception:
+                        traceback.print_exc()
+        except Exception:
+            traceback.print_exc()
@@ -0,0 +1,92 @@
+// Общий клиентский код оверлеев: obs_data приходит по SSE (/events) сразу
+// после тика, а списки обновляются на месте, без перерисовки и мерцания.
+
+// Сервер шлёт полный снимок при подключении, а дальше — дельты
+// (кто вошёл/вышел и изменившиеся поля). Дельта применяется,
+// только если её base совпадает с нашей версией, иначе
+// перезапрашивается снимок. render всегда получает полное состояние.
+function subscribe(render, onError) {
+    let state = null;
+    function bisect(list, name) {
+        let lo = 0, hi = list.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (list[mid] < name) lo = mid + 1; else hi = mid;
+        }
+        return lo;
+    }
+    function apply(data) {
+        if (!data.delta) {
+            state = data;
+        } else if (state && state.version === data.base) {
+            const chatters = state.chatters || (state.chatters = []);
+            data.leaves.forEach(name => {
+                const i = bisect(chatters, name);
+                if (chatters[i] === name) chatters.splice(i, 1);
+            });
+            data.joins.forEach(name => {
+                const i = bisect(chatters, name);
+                if (chatters[i] !== name) chatters.splice(i, 0, name);
+            });
+            Object.keys(data).forEach(k => {
+                if (['delta', 'base', 'joins', 'leaves'].indexOf(k) < 0) state[k] = data[k];
+            });
+        } else {
+            load(state ? state.version : 0);
+            return;
+        }
+        render(state);
+    }
+    function load(since) {
+        const http = location.protocol.indexOf('http') === 0;
+        fetch(http && since ? 'obs_data.json?since=' + since : 'obs_data.json', { cache: 'no-cache' })
+            .then(r => {
+                if (!r.ok) throw new Error('HTTP ' + r.status);
+                return r.json();
+            })
+            .then(data => {
+                if (data.delta && (!state || state.version !== data.base)) load(0);
+                else apply(data);
+            })
+            .catch(onError);
+    }
+    if (window.EventSource && location.protocol.indexOf('http') === 0) {
+        const source = new EventSource('events');
+        source.onmessage = e => apply(JSON.parse(e.data));
+        source.addEventListener('delta', e => apply(JSON.parse(e.data)));
+        source.onerror = () => onError(new Error('Нет связи с сервером, переподключение...'));
+    } else {
+        // Страница открыта как файл (file://): остаётся опрос.
+        load(0);
+        setInterval(() => load(0), 10000);
+    }
+}
+
+function setText(node, text) {
+    text = String(text);
+    if (node.textContent !== text) node.textContent = text;
+}
+
+// Узлы переиспользуются по ключу: DOM меняется только для
+// пришедших, ушедших и сдвинувшихся элементов.
+function patchList(container, items, key, create, update) {
+    const nodes = container._nodes || (container._nodes = new Map());
+    const keep = new Set();
+    items.forEach((item, i) => {
+        const k = key(item);
+        let node = nodes.get(k);
+        if (!node) {
+            node = create(item);
+            nodes.set(k, node);
+        }
+        update(node, item, i);
+        keep.add(k);
+        if (container.children[i] !== node) container.insertBefore(node, container.children[i] || null);
+    });
+    nodes.forEach((node, k) => {
+        if (!keep.has(k)) {
+            node.remove();
+            nodes.delete(k);
+        }
+    });
+}
@@ -0,0 +1,41 @@
+import time
+
+
+class TickScheduler:
+    # Тики идут с фиксированным шагом от момента старта, а не «сон после работы»:
+    # время запросов и записи не сдвигает расписание. Если тик не уложился
+    # в интервал, пропущенные слоты схлопываются в один.
+    def __init__(self, interval: float, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self.next_tick = None
+        self.ticks = 0
+        self.skipped = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    def start(self, at: float = None):
+        self.next_tick = self.clock() if at is None else at
+
+    def fire(self) -> float:
+        lag = self.clock() - self.next_tick
+        if lag >= self.interval:
+            missed = int(lag // self.interval)
+            self.skipped += missed
+            self.next_tick += missed * self.interval
+            lag -= missed * self.interval
+        self.next_tick += self.interval
+        self.ticks += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.total_lag += lag
+        return lag
+
+    @property
+    def avg_lag(self) -> float:
+        return self.total_lag / self.ticks if self.ticks else 0.0
+
+    def summary(self) -> str:
+        return (f"тиков {self.ticks}, пропущено {self.skipped}, "
+                f"задержка ср. {self.avg_lag * 1000:.0f} мс, макс. {self.max_lag * 1000:.0f} мс")
@@ -0,0 +1,231 @@
+import logging
+import threading
+import tkinter as tk
+import tkinter.ttk as ttk
+
+from analytics import COLUMNS, ChatterTable
+from storage import format_seconds
+
+logger = logging.getLogger(__name__)
+
+COLUMN_CONFIG = {
+    "nickname": ("Ник", 180),
+    "visits": ("Визиты", 100),
+    "first_seen": ("Первый раз", 170),
+    "last_seen": ("Последний раз", 170),
+    "watch_time": ("Время пребывания", 150)
+}
+ROW_HEIGHT = 20
+
+
+class StatisticsView(tk.Frame):
+    # Виртуальная таблица статистики: в Treeview живёт столько строк,
+    # сколько помещается на экране, и при прокрутке у них меняются значения.
+    # Загрузка, сортировка и фильтр идут в фоновом потоке, результат —
+    # массив индексов ChatterTable, из которого берётся видимое окно.
+    def __init__(self, parent, store, buffer: int = 50, on_change=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.store = store
+        self.buffer = buffer
+        self.on_change = on_change
+        self.table = None
+        self.view = []
+        self.offset = 0
+        self.visible = 0
+        self.cache = {}
+        self.generation = 0
+        self.sort_state = {"column": "watch_time", "reverse": True}
+        self.search_after = None
+        try:
+            self.row_height = int(ttk.Style(self).lookup("Treeview", "rowheight") or ROW_HEIGHT)
+        except (ValueError, tk.TclError):
+            self.row_height = ROW_HEIGHT
+
+        search_frame = tk.Frame(self, bg=self["bg"])
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        tk.Label(search_frame, text="🔍 Поиск:", bg=self["bg"], font=("Arial", 9)).pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.schedule_filter())
+        tk.Entry(search_frame, textvariable=self.search_var, width=30).pack(side=tk.LEFT, padx=5)
+        self.prefix_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(
+            search_frame, text="только начало ника", variable=self.prefix_var,
+            command=self.schedule_filter, bg=self["bg"], font=("Arial", 9)
+        ).pack(side=tk.LEFT)
+        self.next_btn = tk.Button(search_frame, text="▶", command=lambda: self.page(1), font=("Arial", 9))
+        self.next_btn.pack(side=tk.RIGHT)
+        self.page_label = tk.Label(search_frame, text="⏳ Загрузка...", bg=self["bg"], fg="#555", font=("Arial", 9))
+        self.page_label.pack(side=tk.RIGHT, padx=5)
+        self.prev_btn = tk.Button(search_frame, text="◀", command=lambda: self.page(-1), font=("Arial", 9))
+        self.prev_btn.pack(side=tk.RIGHT)
+
+        tree_frame = tk.Frame(self, bg=self["bg"])
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=COLUMNS, show="headings", height=5)
+        for col, (heading, width) in COLUMN_CONFIG.items():
+            self.tree.heading(col, text=f"{heading} ↕", anchor="center", command=lambda c=col: self.sort_by_column(c))
+            self.tree.column(col, width=width, anchor="center")
+        self.scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.on_scroll)
+        h_scrollbar = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        h_scrollbar.grid(row=1, column=0, sticky="ew")
+        tree_frame.grid_rowconfigure(0, weight=1)
+        tree_frame.grid_columnconfigure(0, weight=1)
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_to(self.offset - (e.delta // 120 or (1 if e.delta > 0 else -1)) * 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.offset - 3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.offset + 3))
+        self.tree.bind("<Prior>", lambda e: self.page(-1))
+        self.tree.bind("<Next>", lambda e: self.page(1))
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda e: self.scroll_to(len(self.view)))
+        self.load()
+
+    def run_in_background(self, work, done):
+        # work() выполняется вне Tk-потока, done(result) — снова в нём,
+        # причём устаревшие результаты (после нового клика) отбрасываются.
+        self.generation += 1
+        generation = self.generation
+
+        def target():
+            try:
+                result = work()
+            except Exception as e:
+                logger.exception("Ошибка фоновой обработки статистики")
+                result = e
+            try:
+                self.after(0, finish, result)
+            except (RuntimeError, tk.TclError):
+                pass
+
+        def finish(result):
+            try:
+                if generation != self.generation or not self.winfo_exists():
+                    return
+            except tk.TclError:
+                return
+            if isinstance(result, Exception):
+                self.page_label.config(text=f"❌ Ошибка: {result}")
+                return
+            done(result)
+
+        threading.Thread(target=target, name="stats", daemon=True).start()
+
+    def load(self):
+        def done(table):
+            self.table = table
+            self.refresh()
+
+        self.run_in_background(lambda: ChatterTable.from_store(self.store), done)
+
+    @staticmethod
+    def select_rows(table, text: str, prefix: bool):
+        if not text:
+            return None
+        if prefix:
+            return table.select(prefix=text)
+        return table.select(search=text)
+
+    def refresh(self):
+        if self.table is None:
+            return
+        # Переменные Tk читаются только здесь, в потоке Tk: work()
+        # получает готовые значения.
+        table = self.table
+        column, reverse = self.sort_state["column"], self.sort_state["reverse"]
+        text, prefix = self.search_var.get().strip(), self.prefix_var.get()
+        self.page_label.config(text="⏳ Сортировка...")
+
+        def work():
+            rows = self.select_rows(table, text, prefix)
+            return rows, table.order(column, reverse, rows)
+
+        def done(result):
+            rows, view = result
+            self.view = view
+            self.cache.clear()
+            for col in COLUMNS:
+                arrow = ""
+                if col == column:
+                    arrow = " ↓" if reverse else " ↑"
+                self.tree.heading(col, text=f"{COLUMN_CONFIG[col][0]}{arrow}")
+            self.scroll_to(0)
+            if self.on_change:
+                self.on_change(self.table, rows)
+
+        self.run_in_background(work, done)
+
+    def sort_by_column(self, column: str):
+        if self.sort_state["column"] == column:
+            self.sort_state["reverse"] = not self.sort_state["reverse"]
+        else:
+            self.sort_state["column"] = column
+            self.sort_state["reverse"] = False if column == "nickname" else True
+        self.refresh()
+
+    def schedule_filter(self):
+        if self.search_after:
+            self.after_cancel(self.search_after)
+        self.search_after = self.after(250, self.refresh)
+
+    def on_resize(self, event):
+        visible = max(1, (event.height - self.row_height) // self.row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def on_scroll(self, action, *args):
+        total = len(self.view)
+        if action == "moveto":
+            self.scroll_to(int(float(args[0]) * total))
+        elif action == "scroll":
+            step = int(args[0]) * (self.visible if args[1] == "pages" else 1)
+            self.scroll_to(self.offset + step)
+
+    def page(self, direction: int):
+        self.scroll_to(self.offset + direction * self.visible)
+
+    def scroll_to(self, offset: int):
+        self.offset = max(0, min(offset, len(self.view) - self.visible))
+        self.render()
+
+    def row_values(self, position: int) -> tuple:
+        values = self.cache.get(position)
+        if values is None:
+            username, user_data = self.table.record(self.view[position])
+            values = (
+                username,
+                user_data.get("visits", 0),
+                user_data.get("first_seen", "N/A"),
+                user_data.get("last_seen", "N/A"),
+                format_seconds(user_data.get("total_watch_time", 0))
+            )
+            self.cache[position] = values
+        return values
+
+    def render(self):
+        # Строки в окне [offset, offset + visible) плюс буфер вокруг
+        # него держатся готовыми; остальное из кэша выбрасывается.
+        total = len(self.view)
+        end = min(total, self.offset + self.visible)
+        low, high = self.offset - self.buffer, end + self.buffer
+        for position in [position for position in self.cache if position < low or position >= high]:
+            del self.cache[position]
+        items = self.tree.get_children()
+        for index, position in enumerate(range(self.offset, end)):
+            if index < len(items):
+                self.tree.item(items[index], values=self.row_values(position))
+            else:
+                self.tree.insert("", "end", values=self.row_values(position))
+        if len(items) > end - self.offset:
+            self.tree.delete(*items[end - self.offset:])
+        for position in range(max(0, low), min(total, high)):
+            self.row_values(position)
+        if total:
+            self.scrollbar.set(self.offset / total, end / total)
+            self.page_label.config(text=f"Строки {self.offset + 1}–{end} из {total}")
+        else:
+            self.scrollbar.set(0, 1)
+            self.page_label.config(text="Ничего не найдено" if self.table is not None else "⏳ Загрузка...")
@@ -0,0 +1,739 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Служебный ключ chatters.json: отметка журнала событий, записанная
+# вместе с данными. Пользователя с таким ником быть не может.
+META_KEY = "__meta__"
+
+logger = logging.getLogger(__name__)
+
+
+def parse_duration(duration_str):
+    try:
+        parts = duration_str.split(':')
+        if len(parts) == 3:
+            hours, minutes, seconds = map(int, parts)
+            return timedelta(hours=hours, minutes=minutes, seconds=seconds)
+    except:
+        pass
+    return timedelta(0)
+
+
+def format_seconds(total_seconds) -> str:
+    total_seconds = int(total_seconds)
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+    return f"{hours:02}:{minutes:02}:{seconds:02}"
+
+
+def watch_seconds(value) -> int:
+    # Старые файлы хранят время просмотра строкой "HH:MM:SS".
+    if isinstance(value, str):
+        return int(parse_duration(value).total_seconds())
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def fsync_dir(directory):
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replace_file(src, dst, retries: int = 5):
+    for attempt in range(retries):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            # Windows не даёт заменить файл, пока его читает другой процесс (OBS, браузер).
+            if attempt == retries - 1:
+                raise
+            time.sleep(0.05 * (attempt + 1))
+
+
+def atomic_write_text(path, text: str, fsync: bool = True):
+    atomic_write(path, text, 'w', fsync, encoding='utf-8')
+
+
+def atomic_write_bytes(path, data: bytes, fsync: bool = True):
+    atomic_write(path, data, 'wb', fsync)
+
+
+def atomic_write(path, data, mode: str, fsync: bool = True, **open_kwargs):
+    # Пишем во временный файл рядом и подменяем им оригинал: читатель или
+    # сбой посреди записи видят либо старую, либо новую версию целиком.
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, mode, **open_kwargs) as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        replace_file(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        fsync_dir(path.parent)
+
+
+def atomic_write_json(path, data, fsync: bool = True, **dump_kwargs):
+    atomic_write_text(path, json.dumps(data, **dump_kwargs), fsync)
+
+
+def snapshot_path(path, index: int) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.name}.{index}")
+
+
+def rotate_snapshots(path, count: int):
+    # chatters.json.1 — самый свежий снимок. Старые снимки сдвигаются
+    # переименованиями, а сам chatters.json остаётся на месте, пока
+    # atomic_write не подменит его новой версией: в .1 уходит жёсткая
+    # ссылка (или копия), так что сбой между ротацией и записью не
+    # оставляет канал без основного файла.
+    path = Path(path)
+    for index in range(count - 1, 0, -1):
+        if snapshot_path(path, index).exists():
+            os.replace(snapshot_path(path, index), snapshot_path(path, index + 1))
+    if not path.exists():
+        return
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    try:
+        os.remove(tmp_path)
+        try:
+            os.link(path, tmp_path)
+        except OSError:
+            shutil.copy2(path, tmp_path)
+        os.replace(tmp_path, snapshot_path(path, 1))
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_chatters_file(path) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data if isinstance(data, dict) else {}
+
+
+def load_chatters_data(path, recover: bool = False) -> dict:
+    # С recover=True повреждённый файл не превращается молча в {}:
+    # берётся самый свежий целый снимок, а битый файл откладывается в сторону.
+    path = Path(path)
+    try:
+        return read_chatters_file(path)
+    except FileNotFoundError:
+        pass
+    except json.JSONDecodeError as e:
+        if not recover:
+            return {}
+        corrupt_path = path.with_name(f"{path.name}.corrupt-{datetime.now():%Y%m%d-%H%M%S}")
+        os.replace(path, corrupt_path)
+        logger.error("Файл %s повреждён (%s), сохранён как %s", path, e, corrupt_path)
+    if not recover:
+        return {}
+    index = 1
+    while snapshot_path(path, index).exists():
+        try:
+            data = read_chatters_file(snapshot_path(path, index))
+            logger.warning("История восстановлена из снимка %s", snapshot_path(path, index))
+            return data
+        except json.JSONDecodeError:
+            index += 1
+    return {}
+
+
+def save_chatters_data(path, data):
+    atomic_write_json(path, data, indent=2, sort_keys=True, ensure_ascii=False)
+
+
+def new_chatter_record(username: str, now_str: str) -> dict:
+    return {
+        "username": username,
+        "visits": 1,
+        "first_seen": now_str,
+        "last_seen": now_str,
+        "total_watch_time": 0,
+        "entry_time": now_str
+    }
+
+
+def json_sort_key(column: str):
+    if column == "username":
+        return lambda item: item[0].lower()
+    if column == "visits":
+        return lambda item: int(item[1].get("visits", 0))
+    if column == "total_watch_time":
+        return lambda item: item[1].get("total_watch_time", 0)
+    return lambda item: item[1].get(column, "")
+
+
+class Leaderboard:
+    # Топ по времени просмотра без сортировки всей истории. Суммы только
+    # растут, поэтому достаточно держать size лучших в min-куче и обновлять
+    # их на выходах пользователей. Идущие сейчас визиты досчитываются
+    # к сохранённой сумме в top(), так что зрители в чате не ждут выхода.
+    def __init__(self, size: int = 10, ignore=None):
+        self.size = size
+        self.ignore = ignore or (lambda username: False)
+        self.totals = {}
+        self.heap = []
+        self.online = {}
+
+    def seed(self, items):
+        for username, total in items:
+            self.update(username, total)
+
+    def min_total(self) -> int:
+        while self.heap and self.totals.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0]
+
+    def update(self, username: str, total: int):
+        if self.ignore(username):
+            return
+        if username in self.totals:
+            if total == self.totals[username]:
+                return
+        elif len(self.totals) >= self.size:
+            if total <= self.min_total():
+                return
+            del self.totals[heapq.heappop(self.heap)[1]]
+        self.totals[username] = total
+        heapq.heappush(self.heap, (total, username))
+        if len(self.heap) > self.size * 4:
+            self.heap = [(total, username) for username, total in self.totals.items()]
+            heapq.heapify(self.heap)
+
+    def enter(self, username: str, total: int, entry_time: datetime):
+        if not self.ignore(username):
+            self.online[username] = (total, entry_time)
+
+    def exit(self, username: str, total: int):
+        self.online.pop(username, None)
+        self.update(username, total)
+
+    def top(self, limit: int = None, now: datetime = None):
+        now = now or datetime.now()
+        online = self.online
+        stored = ((username, total) for username, total in self.totals.items() if username not in online)
+        live = (
+            (username, total + max(0, int((now - entry_time).total_seconds())))
+            for username, (total, entry_time) in online.items()
+        )
+        ranked = heapq.nlargest((limit or self.size) * 2, itertools.chain(stored, live), key=lambda item: item[1])
+        return [item for item in ranked if not self.ignore(item[0])][:limit or self.size]
+
+
+class ChatterStore:
+    # Общий интерфейс хранилищ истории чаттеров. Изменения за тик копятся
+    # в памяти (или в открытой транзакции) и сохраняются одним flush().
+    backend = None
+    snapshots = 0
+    snapshot_interval = 3600
+
+    def __init__(self, path, flush_interval: float = 0):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.lock = threading.RLock()
+        self.dirty = False
+        self.last_flush = time.monotonic()
+        self.leaderboard = None
+        # Первый сегмент журнала событий, ещё не вошедший в сохранённые данные.
+        self.log_segment = 0
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def watch_total(self, username: str) -> int:
+        user_data = self.get(username)
+        return user_data.get("total_watch_time", 0) if user_data else 0
+
+    def watch_totals(self, usernames) -> dict:
+        # Время просмотра сразу для многих ников одним проходом.
+        return {username: self.watch_total(username) for username in usernames}
+
+    def enable_leaderboard(self, size: int = 10, ignore=None):
+        # Затравка — из сохранённой истории и до установки топа: иначе
+        # top_watchers() читал бы из нового, ещё пустого Leaderboard.
+        with self.lock:
+            seed = self.top_records(size, ignore)
+            self.leaderboard = Leaderboard(size, ignore)
+            self.leaderboard.seed((username, user_data.get("total_watch_time", 0)) for username, user_data in seed)
+
+    def track_leaderboard(self, username: str, event_type: str, now: datetime):
+        if self.leaderboard is None:
+            return
+        if event_type == 'entry':
+            self.leaderboard.enter(username, self.watch_total(username), now)
+        elif event_type == 'exit':
+            self.leaderboard.exit(username, self.watch_total(username))
+
+    def get(self, username: str):
+        raise NotImplementedError
+
+    def records(self, order_by: str = "total_watch_time", descending: bool = True,
+                limit: int = None, offset: int = 0):
+        raise NotImplementedError
+
+    def iter_records(self, chunk_size: int = 10000):
+        # Записи по нику порциями: экспорт не держит блокировку на всё время
+        # и не копирует историю целиком.
+        records = self.records("username", False)
+        for start in range(0, len(records), chunk_size):
+            yield records[start:start + chunk_size]
+
+    def columns(self) -> tuple:
+        # Колонки для analytics.ChatterTable: ники, визиты, первый и
+        # последний раз (строки TIME_FORMAT), время просмотра в секундах.
+        records = self.records("username", False)
+        return (
+            [username for username, _ in records],
+            [user_data.get("visits", 0) for _, user_data in records],
+            [user_data.get("first_seen", "") for _, user_data in records],
+            [user_data.get("last_seen", "") for _, user_data in records],
+            [user_data.get("total_watch_time", 0) for _, user_data in records]
+        )
+
+    def top_watchers(self, limit: int = 10, ignore=None, now: datetime = None):
+        ignore = ignore or (lambda username: False)
+        if self.leaderboard is not None and limit <= self.leaderboard.size:
+            top = []
+            with self.lock:
+                for username, seconds in self.leaderboard.top(limit, now):
+                    user_data = self.get(username)
+                    if user_data is None or ignore(username):
+                        continue
+                    user_data["total_watch_time"] = seconds
+                    top.append((username, user_data))
+            return top
+        return self.top_records(limit, ignore)
+
+    def top_records(self, limit: int = 10, ignore=None):
+        # Топ по сохранённым суммам, без учёта идущих визитов.
+        ignore = ignore or (lambda username: False)
+        top = []
+        offset = 0
+        while len(top) < limit:
+            batch = self.records("total_watch_time", True, limit=limit * 2, offset=offset)
+            if not batch:
+                break
+            top.extend(item for item in batch if not ignore(item[0]))
+            offset += len(batch)
+        return top[:limit]
+
+    def open_sessions(self) -> dict:
+        # Визиты без выхода: после сбоя их закрывает журнал событий.
+        raise NotImplementedError
+
+    def update_chatter(self, username: str, event_type: str, entry_time: datetime = None, now: datetime = None):
+        raise NotImplementedError
+
+    def update_all_online_users(self, usernames, now: datetime = None):
+        raise NotImplementedError
+
+    def flush(self, force: bool = False) -> bool:
+        with self.lock:
+            if not self.dirty:
+                return False
+            if not force and time.monotonic() - self.last_flush < self.flush_interval:
+                return False
+            self.save()
+            self.dirty = False
+            self.last_flush = time.monotonic()
+            return True
+
+    def checkpoint(self, segment: int):
+        # Номер сегмента сохраняется тем же flush(), что и данные: после
+        # сбоя в любой момент replay не применит уже учтённые события повторно.
+        with self.lock:
+            self.log_segment = segment
+            self.dirty = True
+            self.flush(force=True)
+
+    def save(self):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush(force=True)
+
+
+class JsonChatterStore(ChatterStore):
+    # Держит chatters.json в памяти: входы, выходы и last_seen за тик
+    # применяются к словарю, а на диск он пишется одним flush().
+    backend = "json"
+
+    def __init__(self, path, flush_interval: float = 0):
+        super().__init__(path, flush_interval)
+        self.data = load_chatters_data(self.path, recover=True)
+        meta = self.data.pop(META_KEY, None)
+        if isinstance(meta, dict):
+            self.log_segment = int(meta.get("log_segment", 0))
+        self.last_snapshot = None
+        self.migrate()
+
+    def migrate(self):
+        for user_data in self.data.values():
+            value = user_data.get("total_watch_time", 0)
+            if not isinstance(value, int):
+                user_data["total_watch_time"] = watch_seconds(value)
+                self.dirty = True
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, username: str):
+        with self.lock:
+            user_data = self.data.get(username)
+            return dict(user_data) if user_data is not None else None
+
+    def watch_totals(self, usernames) -> dict:
+        data = self.data
+        with self.lock:
+            return {username: data[username].get("total_watch_time", 0)
+                    for username in usernames if username in data}
+
+    def records(self, order_by: str = "total_watch_time", descending: bool = True,
+                limit: int = None, offset: int = 0):
+        key = json_sort_key(order_by)
+        with self.lock:
+            if limit is None:
+                items = sorted(self.data.items(), key=key, reverse=descending)
+            elif descending:
+                items = heapq.nlargest(offset + limit, self.data.items(), key=key)
+            else:
+                items = heapq.nsmallest(offset + limit, self.data.items(), key=key)
+        end = offset + limit if limit is not None else None
+        return [(username, dict(user_data)) for username, user_data in items[offset:end]]
+
+    def iter_records(self, chunk_size: int = 10000):
+        with self.lock:
+            usernames = sorted(self.data)
+        for start in range(0, len(usernames), chunk_size):
+            with self.lock:
+                chunk = [(username, dict(self.data[username]))
+                         for username in usernames[start:start + chunk_size] if username in self.data]
+            yield chunk
+
+    def columns(self) -> tuple:
+        with self.lock:
+            values = list(self.data.values())
+            return (
+                list(self.data),
+                [user_data.get("visits", 0) for user_data in values],
+                [user_data.get("first_seen", "") for user_data in values],
+                [user_data.get("last_seen", "") for user_data in values],
+                [user_data.get("total_watch_time", 0) for user_data in values]
+            )
+
+    def open_sessions(self) -> dict:
+        with self.lock:
+            return {
+                username: datetime.strptime(user_data["entry_time"], TIME_FORMAT)
+                for username, user_data in self.data.items() if user_data.get("entry_time")
+            }
+
+    def update_chatter(self, username: str, event_type: str, entry_time: datetime = None, now: datetime = None):
+        now = now or datetime.now()
+        now_str = now.strftime(TIME_FORMAT)
+        with self.lock:
+            user_data = self.data.get(username)
+            if user_data is None:
+                self.data[username] = new_chatter_record(username, now_str)
+            elif event_type == 'entry':
+                user_data["visits"] = user_data.get("visits", 0) + 1
+                user_data["last_seen"] = now_str
+                user_data["entry_time"] = now_str
+            elif event_type == 'exit' and entry_time:
+                user_data["last_seen"] = now_str
+                duration = int((now - entry_time).total_seconds())
+                if duration > 0:
+                    user_data["total_watch_time"] = user_data.get("total_watch_time", 0) + duration
+                user_data.pop("entry_time", None)
+            self.dirty = True
+            self.track_leaderboard(username, event_type, now)
+
+    def update_all_online_users(self, usernames, now: datetime = None):
+        now_str = (now or datetime.now()).strftime(TIME_FORMAT)
+        with self.lock:
+            for username in usernames:
+                user_data = self.data.get(username)
+                if user_data is not None:
+                    user_data["last_seen"] = now_str
+                else:
+                    self.data[username] = new_chatter_record(username, now_str)
+            if usernames:
+                self.dirty = True
+
+    def save(self):
+        if self.snapshots and (self.last_snapshot is None
+                               or time.monotonic() - self.last_snapshot >= self.snapshot_interval):
+            rotate_snapshots(self.path, self.snapshots)
+            self.last_snapshot = time.monotonic()
+        if not self.log_segment:
+            save_chatters_data(self.path, self.data)
+            return
+        # Отметка журнала пишется в тот же файл, без копии словаря.
+        self.data[META_KEY] = {"log_segment": self.log_segment}
+        try:
+            save_chatters_data(self.path, self.data)
+        finally:
+            del self.data[META_KEY]
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    visits INTEGER NOT NULL DEFAULT 1,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    total_watch_time INTEGER NOT NULL DEFAULT 0,
+    entry_time TEXT
+);
+CREATE INDEX IF NOT EXISTS users_total_watch_time ON users (total_watch_time);
+CREATE INDEX IF NOT EXISTS users_last_seen ON users (last_seen);
+CREATE INDEX IF NOT EXISTS users_visits ON users (visits);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+SQLITE_ORDER = {
+    "username": "username COLLATE NOCASE",
+    "visits": "visits",
+    "first_seen": "first_seen",
+    "last_seen": "last_seen",
+    "total_watch_time": "total_watch_time"
+}
+
+SQLITE_BATCH = 900
+
+SQLITE_NEW_USER = (
+    "INSERT INTO users (username, visits, first_seen, last_seen, total_watch_time, entry_time) "
+    "VALUES (?, 1, ?, ?, 0, ?) ON CONFLICT (username) DO UPDATE SET "
+)
+
+
+class SqliteChatterStore(ChatterStore):
+    # SQLite в режиме WAL: пользователи с индексами под сортировки.
+    # Отдельные визиты для обоих хранилищ пишет history.SessionHistory,
+    # здесь их не дублируем. Все изменения тика идут в одну транзакцию,
+    # которую закрывает flush().
+    backend = "sqlite"
+
+    def __init__(self, path, flush_interval: float = 0):
+        super().__init__(path, flush_interval)
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level="DEFERRED")
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SQLITE_SCHEMA)
+        self.db.commit()
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'log_segment'").fetchone()
+        self.log_segment = int(row[0]) if row else 0
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    @staticmethod
+    def row_to_record(row) -> tuple:
+        username, visits, first_seen, last_seen, total_watch_time, entry_time = row
+        user_data = {
+            "username": username,
+            "visits": visits,
+            "first_seen": first_seen,
+            "last_seen": last_seen,
+            "total_watch_time": total_watch_time
+        }
+        if entry_time:
+            user_data["entry_time"] = entry_time
+        return username, user_data
+
+    def watch_total(self, username: str) -> int:
+        with self.lock:
+            row = self.db.execute("SELECT total_watch_time FROM users WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else 0
+
+    def watch_totals(self, usernames) -> dict:
+        # Пачками по SQLITE_BATCH ников: лимит параметров запроса в старых SQLite — 999.
+        usernames = list(usernames)
+        totals = {}
+        with self.lock:
+            for start in range(0, len(usernames), SQLITE_BATCH):
+                batch = usernames[start:start + SQLITE_BATCH]
+                totals.update(self.db.execute(
+                    "SELECT username, total_watch_time FROM users "
+                    f"WHERE username IN ({','.join('?' * len(batch))})", batch
+                ))
+        return totals
+
+    def get(self, username: str):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT username, visits, first_seen, last_seen, total_watch_time, entry_time "
+                "FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        return self.row_to_record(row)[1] if row else None
+
+    def records(self, order_by: str = "total_watch_time", descending: bool = True,
+                limit: int = None, offset: int = 0):
+        order = SQLITE_ORDER[order_by]
+        direction = "DESC" if descending else "ASC"
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT username, visits, first_seen, last_seen, total_watch_time, entry_time "
+                f"FROM users ORDER BY {order} {direction} LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset)
+            ).fetchall()
+        return [self.row_to_record(row) for row in rows]
+
+    def iter_records(self, chunk_size: int = 10000):
+        # Постраничный проход по первичному ключу, а не OFFSET.
+        last = ""
+        while True:
+            with self.lock:
+                rows = self.db.execute(
+                    "SELECT username, visits, first_seen, last_seen, total_watch_time, entry_time "
+                    "FROM users WHERE username > ? ORDER BY username LIMIT ?", (last, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [self.row_to_record(row) for row in rows]
+
+    def columns(self) -> tuple:
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT username, visits, first_seen, last_seen, total_watch_time FROM users"
+            ).fetchall()
+        if not rows:
+            return [], [], [], [], []
+        return tuple(list(column) for column in zip(*rows))
+
+    def open_sessions(self) -> dict:
+        with self.lock:
+            rows = self.db.execute("SELECT username, entry_time FROM users WHERE entry_time IS NOT NULL").fetchall()
+        return {username: datetime.strptime(entry_time, TIME_FORMAT) for username, entry_time in rows}
+
+    def update_chatter(self, username: str, event_type: str, entry_time: datetime = None, now: datetime = None):
+        now = now or datetime.now()
+        now_str = now.strftime(TIME_FORMAT)
+        with self.lock:
+            if event_type == 'entry':
+                self.db.execute(
+                    SQLITE_NEW_USER + "visits = visits + 1, last_seen = excluded.last_seen, "
+                    "entry_time = excluded.entry_time",
+                    (username, now_str, now_str, now_str)
+                )
+            elif event_type == 'exit' and entry_time:
+                duration = max(0, int((now - entry_time).total_seconds()))
+                self.db.execute(
+                    SQLITE_NEW_USER + "last_seen = excluded.last_seen, "
+                    "total_watch_time = total_watch_time + ?, entry_time = NULL",
+                    (username, now_str, now_str, now_str, duration)
+                )
+            else:
+                self.db.execute(
+                    "INSERT OR IGNORE INTO users (username, visits, first_seen, last_seen, total_watch_time, entry_time) "
+                    "VALUES (?, 1, ?, ?, 0, ?)",
+                    (username, now_str, now_str, now_str)
+                )
+            self.dirty = True
+            self.track_leaderboard(username, event_type, now)
+
+    def update_all_online_users(self, usernames, now: datetime = None):
+        now_str = (now or datetime.now()).strftime(TIME_FORMAT)
+        with self.lock:
+            self.db.executemany(
+                SQLITE_NEW_USER + "last_seen = excluded.last_seen",
+                ((username, now_str, now_str, now_str) for username in usernames)
+            )
+            if usernames:
+                self.dirty = True
+
+    def save(self):
+        # Отметка журнала уходит в ту же транзакцию, что и изменения тика.
+        if self.log_segment:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('log_segment', ?)",
+                            (str(self.log_segment),))
+        self.db.commit()
+
+    def close(self):
+        with self.lock:
+            super().close()
+            self.db.close()
+
+
+def import_json(json_path, store: SqliteChatterStore) -> int:
+    data = load_chatters_data(json_path)
+    rows = []
+    for username, user_data in data.items():
+        if username == META_KEY or not isinstance(user_data, dict):
+            continue
+        first_seen = user_data.get("first_seen", "")
+        rows.append((
+            username,
+            int(user_data.get("visits", 1)),
+            first_seen,
+            user_data.get("last_seen", first_seen),
+            watch_seconds(user_data.get("total_watch_time", 0)),
+            user_data.get("entry_time")
+        ))
+    with store.lock:
+        store.db.executemany(
+            "INSERT INTO users (username, visits, first_seen, last_seen, total_watch_time, entry_time) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (username) DO UPDATE SET "
+            "visits = excluded.visits, first_seen = excluded.first_seen, last_seen = excluded.last_seen, "
+            "total_watch_time = excluded.total_watch_time, entry_time = excluded.entry_time",
+            rows
+        )
+        store.db.commit()
+    return len(rows)
+
+
+STORES = {
+    "json": (JsonChatterStore, "chatters.json"),
+    "sqlite": (SqliteChatterStore, "chatters.db")
+}
+
+
+def open_store(directory, backend: str = "json", flush_interval: float = 0) -> ChatterStore:
+    # При первом открытии SQLite-хранилища в папке с chatters.json
+    # история переносится в базу автоматически.
+    store_class, filename = STORES[backend]
+    path = Path(directory) / filename
+    is_new = not path.exists()
+    store = store_class(path, flush_interval)
+    json_path = Path(directory) / "chatters.json"
+    if backend == "sqlite" and is_new and json_path.exists():
+        import_json(json_path, store)
+    return store
@@ -0,0 +1,55 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from engine import churn_lines
+from storage import STORES, SQLITE_BATCH, open_store, save_chatters_data
+
+
+class ChurnLinesTest(unittest.TestCase):
+    def test_small_burst_lists_everyone(self):
+        lines = churn_lines(["a", "b"], "🔴", "ВЫХОД", "вышел из чата", "вышли из чата", "−", threshold=2)
+        self.assertEqual(lines, ["🔴 [ВЫХОД] Пользователь 'a' вышел из чата",
+                                 "🔴 [ВЫХОД] Пользователь 'b' вышел из чата"])
+
+    def test_join_summary_is_plain_sample(self):
+        users = {f"raider{i}" for i in range(30)}
+        line, = churn_lines(users, "🟢", "ВХОД", "зашёл в чат", "зашли в чат", "+", threshold=20)
+        self.assertTrue(line.startswith("🟢 [ВХОД] +30 зашли в чат, например: raider0, raider1, raider10"))
+        self.assertTrue(line.endswith(" и ещё 20"))
+
+    def test_leave_summary_ranked_by_watch_time(self):
+        totals = {f"u{i}": i for i in range(30)}
+        calls = []
+
+        def watch_totals(users):
+            calls.append(len(users))
+            return totals
+
+        line, = churn_lines(list(totals), "🔴", "ВЫХОД", "вышел из чата", "вышли из чата", "−",
+                            threshold=20, watch_totals=watch_totals)
+        self.assertTrue(line.startswith("🔴 [ВЫХОД] −30 вышли из чата, дольше всех смотрели: u29, u28, u27"))
+        self.assertEqual(calls, [30])
+
+
+class WatchTotalsTest(unittest.TestCase):
+    def test_batched_lookup(self):
+        count = SQLITE_BATCH * 2 + 5
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            save_chatters_data(directory / "chatters.json", {
+                f"u{i}": {"username": f"u{i}", "visits": 1, "first_seen": "2026-01-01 10:00:00",
+                          "last_seen": "2026-01-01 11:00:00", "total_watch_time": i}
+                for i in range(count)
+            })
+            for backend in sorted(STORES):
+                with self.subTest(backend=backend):
+                    store = open_store(directory, backend)
+                    totals = store.watch_totals([f"u{i}" for i in range(count)] + ["ghost"])
+                    store.close()
+                    self.assertEqual(len(totals), count)
+                    self.assertEqual(totals[f"u{count - 1}"], count - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import eventlog
+from engine import ChannelMonitor
+from eventlog import EventLog, event, recover
+from history import SessionHistory, stream_id
+from storage import META_KEY, STORES, open_store
+
+
+class CheckpointReplayTest(unittest.TestCase):
+    # Сбой между сбросом хранилища и записью файла checkpoint
+    # не должен приводить к повторному применению событий.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def crash_after_flush(self, backend: str):
+        store = open_store(self.directory, backend)
+        log = EventLog(self.directory / "events")
+        entered, exited = datetime(2026, 1, 1, 10), datetime(2026, 1, 1, 11)
+        store.update_chatter("viewer", 'entry', now=entered)
+        store.update_chatter("viewer", 'exit', entered, now=exited)
+        log.append([event("join", entered, "viewer"), event("leave", exited, "viewer", entered)])
+        with mock.patch.object(eventlog, "atomic_write_text", side_effect=OSError("crash")):
+            with self.assertRaises(OSError):
+                log.checkpoint(store.checkpoint)
+        log.close()
+        if backend == "sqlite":
+            store.db.close()
+
+    def test_replay_skips_flushed_segments(self):
+        for backend in sorted(STORES):
+            with self.subTest(backend=backend):
+                self.crash_after_flush(backend)
+                store = open_store(self.directory, backend)
+                log = EventLog(self.directory / "events")
+                self.assertEqual(recover(store, log), 0)
+                user_data = store.get("viewer")
+                self.assertEqual(user_data["total_watch_time"], 3600)
+                self.assertEqual(user_data["visits"], 1)
+                log.close()
+                store.close()
+                self.tmp.cleanup()
+                self.directory.mkdir()
+
+    def test_meta_key_not_a_record(self):
+        self.crash_after_flush("json")
+        saved = json.loads((self.directory / "chatters.json").read_text(encoding="utf-8"))
+        self.assertEqual(saved[META_KEY], {"log_segment": 2})
+        store = open_store(self.directory, "json")
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.log_segment, 2)
+
+
+class RecoverStreamTest(unittest.TestCase):
+    # Визиты, закрытые восстановлением после сбоя, сохраняют свой стрим.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def monitor(self):
+        return ChannelMonitor(None, "chan", "1", open_store(self.directory, "json"),
+                              event_log=EventLog(self.directory / "events"),
+                              history=SessionHistory(self.directory / "history"))
+
+    def test_crashed_sessions_keep_stream(self):
+        started_at = "2026-01-01T18:00:00Z"
+        stream_info = {"is_live": True, "started_at": started_at}
+        monitor = self.monitor()
+        monitor.persist({"early"}, {"early"}, [], stream_info)
+        monitor.checkpoint()
+        monitor.persist({"early", "late"}, {"late"}, [], stream_info)
+        # Сбой: stop() не вызывается, журнал просто закрывается.
+        monitor.event_log.close()
+
+        monitor = self.monitor()
+        monitor.start()
+        viewers = monitor.history.stream_viewers(stream_id(started_at))
+        self.assertEqual(set(viewers), {"early", "late"})
+
+
+if __name__ == "__main__":
+    unittest.main()
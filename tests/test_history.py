@@ -0,0 +1,71 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from history import BUCKET_SECONDS, SessionHistory, stream_id
+
+BASE = 1_767_290_400
+
+
+class SessionHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        self.history = SessionHistory(self.directory)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def reopen(self):
+        self.history = SessionHistory(self.directory)
+
+    def test_sessions_between_bounds(self):
+        self.history.add_sessions([
+            ("a", BASE, BASE + 100, 0),
+            ("b", BASE + 200, BASE + 300, 0),
+            # Длинный визит: выходит позже конца окна, но пересекает его.
+            ("long", BASE + 50, BASE + 5000, 0),
+        ])
+
+        def names(start, end):
+            return sorted(row[0] for row in self.history.sessions_between(start, end))
+
+        self.assertEqual(names(BASE + 100, BASE + 200), ["long"])
+        self.assertEqual(names(BASE + 99, BASE + 201), ["a", "b", "long"])
+        self.assertEqual(names(BASE - 100, BASE), [])
+        self.assertEqual(names(BASE + 5000, BASE + 6000), [])
+
+    def test_out_of_order_insert(self):
+        self.history.add_sessions([("a", BASE, BASE + 100, 0), ("b", BASE, BASE + 300, 0)])
+        # Визит, закрытый восстановлением, приходит с более ранним выходом.
+        self.history.add_sessions([("late", BASE, BASE + 200, 0)])
+        self.assertEqual([row[0] for row in self.history.sessions_between(BASE, BASE + 400)], ["a", "late", "b"])
+        self.reopen()
+        self.assertEqual(list(self.history.sessions["exit"]), [BASE + 100, BASE + 200, BASE + 300])
+        self.assertEqual([row[0] for row in self.history.sessions_between(BASE + 150, BASE + 250)], ["late", "b"])
+
+    def test_stream_viewers(self):
+        stream = stream_id("2026-01-01T18:00:00Z")
+        self.history.add_sessions([("a", stream, stream + 60, stream), ("b", stream, stream + 30, stream)])
+        self.assertEqual(self.history.streams(), [stream])
+        self.history.add_sessions([("a", stream + 100, stream + 160, stream), ("c", stream, stream + 10, 0)])
+        self.assertEqual(self.history.stream_viewers(stream), {"a": 120, "b": 30})
+        self.reopen()
+        self.assertEqual(self.history.stream_viewers(stream), {"a": 120, "b": 30})
+
+    def test_bucket_rollover(self):
+        minute = BASE // BUCKET_SECONDS * BUCKET_SECONDS
+        self.history.sample(minute + 5, 10)
+        self.history.sample(minute + 30, 20)
+        self.history.sample(minute + BUCKET_SECONDS, 4)
+        # Первая минута закрыта сменой минуты, вторая ещё копится.
+        self.assertEqual(self.history.concurrency(minute, minute + 2 * BUCKET_SECONDS),
+                         [(minute, 20, 15.0), (minute + BUCKET_SECONDS, 4, 4.0)])
+        self.history.flush()
+        self.reopen()
+        self.assertEqual(self.history.concurrency(minute + BUCKET_SECONDS, minute + 2 * BUCKET_SECONDS),
+                         [(minute + BUCKET_SECONDS, 4, 4.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from ignore import IgnoreFilter
+
+
+class IgnoreFilterTest(unittest.TestCase):
+    def test_exact_names(self):
+        ignore = IgnoreFilter([" NightBot ", "moobot", ""])
+        self.assertTrue(ignore("nightbot"))
+        self.assertTrue(ignore("MooBot"))
+        self.assertFalse(ignore("nightbot2"))
+
+    def test_globs(self):
+        ignore = IgnoreFilter(["*Bot", "stream?abs"])
+        self.assertTrue(ignore("coolbot"))
+        self.assertTrue(ignore("streamlabs"))
+        self.assertFalse(ignore("botany"))
+
+    def test_regex_keeps_escapes(self):
+        ignore = IgnoreFilter([r"re:^bot_\D+$"])
+        self.assertTrue(ignore("bot_abc"))
+        self.assertTrue(ignore("BOT_ABC"))
+        self.assertFalse(ignore("bot_123"))
+
+    def test_invalid_regex_skipped(self):
+        with self.assertLogs("ignore", "WARNING"):
+            ignore = IgnoreFilter(["re:(", r"re:^bot_\d+$", "nightbot"])
+        self.assertTrue(ignore("bot_42"))
+        self.assertTrue(ignore("nightbot"))
+        self.assertFalse(ignore("viewer"))
+
+    def test_filter(self):
+        ignore = IgnoreFilter(["nightbot", "*_bot", r"re:^spam\d+$"])
+        users = {"nightbot", "helper_bot", "spam1", "spamx", "viewer"}
+        self.assertEqual(ignore.filter(users), {"spamx", "viewer"})
+
+
+if __name__ == "__main__":
+    unittest.main()
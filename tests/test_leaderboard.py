@@ -0,0 +1,57 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from engine import ChannelMonitor
+from ignore import IgnoreFilter
+from storage import STORES, open_store, save_chatters_data
+
+
+def write_history(directory: Path, count: int = 50):
+    save_chatters_data(directory / "chatters.json", {
+        f"u{i}": {"username": f"u{i}", "visits": 1, "first_seen": "2026-01-01 10:00:00",
+                  "last_seen": "2026-01-01 11:00:00", "total_watch_time": 60 * i}
+        for i in range(count)
+    })
+
+
+class LeaderboardSeedTest(unittest.TestCase):
+    # Топ после перезапуска берётся из уже накопленной истории.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        write_history(self.directory)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_seeded_from_history(self):
+        for backend in sorted(STORES):
+            with self.subTest(backend=backend):
+                store = open_store(self.directory, backend)
+                before = [username for username, _ in store.top_watchers(3)]
+                store.enable_leaderboard(10)
+                after = [username for username, _ in store.top_watchers(3)]
+                store.close()
+                self.assertEqual(before, ["u49", "u48", "u47"])
+                self.assertEqual(after, before)
+
+    def test_seed_respects_ignore(self):
+        store = open_store(self.directory, "json")
+        ignore = IgnoreFilter({"u49"})
+        store.enable_leaderboard(10, ignore)
+        self.assertEqual([username for username, _ in store.top_watchers(2, ignore)], ["u48", "u47"])
+
+    def test_obs_data_after_restart(self):
+        store = open_store(self.directory, "json")
+        obs_dir = self.directory / "obs_stats"
+        monitor = ChannelMonitor(None, "chan", "1", store, obs_dir=obs_dir)
+        monitor.start()
+        monitor.stop()
+        obs_data = json.loads((obs_dir / "obs_data.json").read_text(encoding="utf-8"))
+        self.assertEqual([viewer["name"] for viewer in obs_data["top_viewers"][:3]], ["u49", "u48", "u47"])
+
+
+if __name__ == "__main__":
+    unittest.main()